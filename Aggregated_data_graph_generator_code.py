@@ -3,79 +3,592 @@ from dotenv import load_dotenv
 import pandas as pd
 import matplotlib.pyplot as plt
 import io
+import json
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+import xlsxwriter
 
-def create_visualizations(df, output_path):
+REQUIRED_COLUMNS = ['Year of Harvest', 'City', 'Date Sown', 'Date of Cut (Last Cut)']
+DATE_COLUMNS = ['Date Sown', 'Date of Cut (Last Cut)']
+# Dates that cannot be parsed keep their text in a companion column, written back into the raw data sheet
+RAW_DATE_SUFFIX = ' (as written)'
+# Low-cardinality columns are stored as categoricals instead of object/int64
+CATEGORY_COLUMNS = {'Year of Harvest': 'category', 'City': 'category'}
+# Rows converted to Python values at a time when streaming the raw data sheet
+RAW_DATA_BLOCK_ROWS = 100_000
+# Default directory of the persistent aggregate store
+AGGREGATE_STORE_DIR = '.aggregate_store'
+# Bytes of CSV parsed at a time when folding new rows into the aggregate store
+STORE_BLOCK_BYTES = 64 * 1024 * 1024
+# Bytes hashed at the start and at the end of the folded part of a CSV, to tell an append from a rewrite
+FINGERPRINT_BYTES = 64 * 1024
+SUMMARY_KEYS = ['source', 'tail', 'Year of Harvest', 'City']
+SUMMARY_VALUES = ['count', 'sown_min', 'sown_max', 'cut_min', 'cut_max', 'season_days_sum', 'season_days_n']
+
+def validate_csv_header(csv_path, required_columns=REQUIRED_COLUMNS):
     """
-    Create visualizations of the data and add to Excel workbook
+    Check that the CSV has the required columns by reading its header only
+    
+    Args:
+    csv_path (str): Path to the CSV file
+    required_columns (list): Columns that must be present
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing_columns = [col for col in required_columns if col not in header]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+
+def _convert_types(df):
+    """Give the date columns a datetime dtype and make numeric year categories sort as numbers"""
+    for col in DATE_COLUMNS:
+        # Each value is parsed on its own, so a file mixing date formats keeps all of its dates
+        parsed = pd.to_datetime(df[col], format='mixed', errors='coerce')
+        df[col + RAW_DATE_SUFFIX] = df[col].astype(object).where(parsed.isna() & df[col].notna())
+        df[col] = parsed
+    years = df['Year of Harvest'].cat.categories
+    numeric_years = pd.to_numeric(years, errors='coerce')
+    if not numeric_years.isna().any():
+        df['Year of Harvest'] = df['Year of Harvest'].cat.rename_categories(numeric_years.astype('int64'))
+        df['Year of Harvest'] = df['Year of Harvest'].cat.reorder_categories(
+            sorted(df['Year of Harvest'].cat.categories))
+    return df
+
+def read_required_columns(csv_path, required_columns=REQUIRED_COLUMNS):
+    """
+    Read only the required columns of the CSV, with categorical and date dtypes, using the pyarrow engine
+    
+    Args:
+    csv_path (str): Path to the CSV file
+    required_columns (list): Columns to read
+    
+    Returns:
+    pandas.DataFrame: The required columns in file order
+    """
+    df = pd.read_csv(csv_path, usecols=required_columns, dtype=CATEGORY_COLUMNS, engine='pyarrow')
+    return _convert_types(df.reindex(columns=required_columns))
+
+def iter_required_columns(csv_path, chunksize, required_columns=REQUIRED_COLUMNS):
+    """
+    Stream the required columns of the CSV in chunks of `chunksize` rows (for files larger than memory)
+    
+    Args:
+    csv_path (str): Path to the CSV file
+    chunksize (int): Number of rows per chunk
+    required_columns (list): Columns to read
+    
+    Yields:
+    pandas.DataFrame: One chunk of the required columns
+    """
+    # The pyarrow engine cannot read in chunks, so streaming uses the C engine
+    reader = pd.read_csv(csv_path, usecols=required_columns, dtype=CATEGORY_COLUMNS, chunksize=chunksize)
+    for chunk in reader:
+        yield _convert_types(chunk.reindex(columns=required_columns))
+
+def _chunk_counts(df):
+    """Count tables of one frame: entries per year, per city and per (year, city)"""
+    return {
+        'year_counts': df['Year of Harvest'].value_counts(),
+        'city_counts': df['City'].value_counts(),
+        'year_city_counts': df.groupby(['Year of Harvest', 'City'], observed=True).size(),
+        'rows': len(df),
+    }
+
+def _finish_aggregates(counts):
+    """Turn summed count tables into the tables the charts are drawn from"""
+    year_counts = counts['year_counts']
+    city_counts = counts['city_counts']
+    pivot_data = counts['year_city_counts'].unstack(fill_value=0)
+    return {
+        'year_counts': year_counts[year_counts > 0].sort_index().astype('int64'),
+        'city_counts': city_counts[city_counts > 0].sort_values(ascending=False, kind='stable').astype('int64'),
+        'pivot_data': pivot_data.sort_index().sort_index(axis=1).astype('int64'),
+        'rows': counts['rows'],
+    }
+
+def compute_aggregates(df):
+    """
+    Compute the count tables behind the charts from a DataFrame
     
     Args:
     df (pandas.DataFrame): DataFrame containing the data
+    
+    Returns:
+    dict: year_counts, city_counts, pivot_data (year x city) and the row count
+    """
+    return _finish_aggregates(_chunk_counts(df))
+
+def aggregate_chunks(chunks):
+    """
+    Build the chart aggregates incrementally from an iterable of DataFrame chunks
+    
+    Args:
+    chunks (iterable): DataFrames with the required columns
+    
+    Returns:
+    dict: Same structure as compute_aggregates
+    """
+    totals = {
+        'year_counts': pd.Series(dtype='int64'),
+        'city_counts': pd.Series(dtype='int64'),
+        'year_city_counts': pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays(
+            [[], []], names=['Year of Harvest', 'City'])),
+        'rows': 0,
+    }
+    for chunk in chunks:
+        counts = _chunk_counts(chunk)
+        for key in ['year_counts', 'city_counts', 'year_city_counts']:
+            # Categories differ between chunks, so align on plain labels before adding
+            totals[key] = totals[key].add(_plain_index(counts[key]), fill_value=0)
+        totals['rows'] += counts['rows']
+    return _finish_aggregates(totals)
+
+def _plain_index(series):
+    """Replace categorical index levels with plain ones so count tables of different chunks can be added"""
+    if isinstance(series.index, pd.MultiIndex):
+        index = pd.MultiIndex.from_arrays(
+            [series.index.get_level_values(i).astype(object) for i in range(series.index.nlevels)],
+            names=series.index.names)
+    else:
+        index = series.index.astype(object)
+    return pd.Series(series.to_numpy(), index=index, name=series.name)
+
+def _last_record_end(data):
+    """Position just after the last line break of `data` that ends a CSV record (0 when there is none).
+    `data` starts at a record; a line break with an odd number of quotes before it is inside a quoted field."""
+    total = data.count(b'"')
+    quotes_after, end = 0, len(data)
+    while True:
+        cut = data.rfind(b'\n', 0, end)
+        if cut < 0:
+            return 0
+        quotes_after += data.count(b'"', cut, end)
+        if (total - quotes_after) % 2 == 0:
+            return cut + 1
+        end = cut
+
+def _iter_csv_lines(csv_path, offset=None, required_columns=REQUIRED_COLUMNS, block_bytes=STORE_BLOCK_BYTES):
+    """
+    Parse the CSV from byte `offset` (just after the header when None) in blocks of whole records. Blocks are
+    only cut at line breaks outside quoted fields, so a quoted value spanning lines stays in one block.
+    
+    Args:
+    csv_path (str): Path to the CSV file
+    offset (int): Byte position of the first line to read
+    required_columns (list): Columns to read
+    block_bytes (int): Approximate number of bytes parsed at a time
+    
+    Yields:
+    tuple: (chunk DataFrame, byte offset after the chunk, tail) where tail marks a last record without a
+    line break, which may still be being written (a last record with an open quoted field is not read)
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        position = len(header) if offset is None else offset
+        f.seek(position)
+        pending = b''
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                break
+            data = pending + block
+            cut = _last_record_end(data)
+            pending = data[cut:]
+            if cut:
+                chunk = pd.read_csv(io.BytesIO(header + data[:cut]), usecols=required_columns, dtype=CATEGORY_COLUMNS)
+                position += cut
+                yield _convert_types(chunk.reindex(columns=required_columns)), position, False
+        if pending.strip() and pending.count(b'"') % 2 == 0:
+            chunk = pd.read_csv(io.BytesIO(header + pending + b'\n'), usecols=required_columns, dtype=CATEGORY_COLUMNS)
+            yield _convert_types(chunk.reindex(columns=required_columns)), position, True
+
+def _year_city_summary(df, source, tail=False):
+    """Mergeable summary of one frame per (year, city): row count, date ranges and season length sums"""
+    frame = pd.DataFrame({
+        'Year of Harvest': df['Year of Harvest'].astype('string'),
+        'City': df['City'].astype('string'),
+        'Date Sown': df['Date Sown'],
+        'Date of Cut (Last Cut)': df['Date of Cut (Last Cut)'],
+        'season_days': (df['Date of Cut (Last Cut)'] - df['Date Sown']).dt.days,
+    })
+    # Rows without a year or a city still count towards the other column's totals
+    summary = frame.groupby(['Year of Harvest', 'City'], dropna=False).agg(
+        count=('Date Sown', 'size'),
+        sown_min=('Date Sown', 'min'),
+        sown_max=('Date Sown', 'max'),
+        cut_min=('Date of Cut (Last Cut)', 'min'),
+        cut_max=('Date of Cut (Last Cut)', 'max'),
+        season_days_sum=('season_days', 'sum'),
+        season_days_n=('season_days', 'count'),
+    ).reset_index()
+    summary.insert(0, 'source', source)
+    summary.insert(1, 'tail', tail)
+    return summary
+
+def _merge_summaries(frames, keys=SUMMARY_KEYS):
+    """Add up summaries of the same keys (counts and sums are added, date ranges widened)"""
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.groupby(keys, dropna=False).agg(
+        count=('count', 'sum'),
+        sown_min=('sown_min', 'min'),
+        sown_max=('sown_max', 'max'),
+        cut_min=('cut_min', 'min'),
+        cut_max=('cut_max', 'max'),
+        season_days_sum=('season_days_sum', 'sum'),
+        season_days_n=('season_days_n', 'sum'),
+    ).reset_index()
+
+def _year_labels(years):
+    """Year labels as integers when they are all numeric, so they sort like _convert_types sorts them"""
+    numeric = pd.to_numeric(years, errors='coerce')
+    if numeric[years.notna()].notna().all():
+        return numeric.astype('Int64')
+    return years
+
+class AggregateStore:
+    """
+    Persistent per (source CSV, year, city) summaries of the harvest data, from which the chart aggregates
+    are built without reading the CSV again. Each source remembers how many bytes of it have been folded in,
+    so an update only parses the rows appended since the last one; a source that was rewritten rather than
+    appended to is folded in again from scratch.
+    """
+
+    def __init__(self, store_dir=AGGREGATE_STORE_DIR):
+        self.store_dir = store_dir
+        self.state_path = os.path.join(store_dir, 'state.json')
+        os.makedirs(store_dir, exist_ok=True)
+        self.state = {'version': 0, 'sources': {}}
+        self.summary = pd.DataFrame(columns=SUMMARY_KEYS + SUMMARY_VALUES)
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+            self.summary = pd.read_parquet(os.path.join(store_dir, self.state['summary_file']))
+
+    def _fingerprint(self, csv_path, offset):
+        """Hash of the first and last FINGERPRINT_BYTES of the folded part of a CSV (constant cost)"""
+        digest = hashlib.sha256()
+        with open(csv_path, 'rb') as f:
+            digest.update(f.read(min(offset, FINGERPRINT_BYTES)))
+            f.seek(max(offset - FINGERPRINT_BYTES, 0))
+            digest.update(f.read(offset - max(offset - FINGERPRINT_BYTES, 0)))
+        return digest.hexdigest()
+
+    def _drop(self, source, tail_only=False):
+        dropped = (self.summary['source'] == source) & (self.summary['tail'].astype(bool) | (not tail_only))
+        self.summary = self.summary[~dropped]
+
+    def _save(self):
+        # The state file is the commit point: it names the summary file, which is never overwritten in place
+        self.state['version'] += 1
+        summary_file = f"year_city_summary_{self.state['version']}.parquet"
+        self.summary.to_parquet(os.path.join(self.store_dir, summary_file), index=False)
+        previous = self.state.get('summary_file')
+        self.state['summary_file'] = summary_file
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+        if previous:
+            os.remove(os.path.join(self.store_dir, previous))
+
+    def update(self, csv_path, required_columns=REQUIRED_COLUMNS):
+        """
+        Fold the rows of a CSV that are not in the store yet into it
+        
+        Args:
+        csv_path (str): Path to the CSV file
+        required_columns (list): Columns to read
+        
+        Returns:
+        int: Number of rows read (0 when the file has not changed since the last update)
+        """
+        source = os.path.abspath(csv_path)
+        size = os.path.getsize(csv_path)
+        known = self.state['sources'].get(source)
+        if known is not None and (size < known['offset']
+                                  or self._fingerprint(csv_path, known['offset']) != known['fingerprint']):
+            # Rewritten, not appended to: forget what was folded in and start over
+            self._drop(source)
+            known = None
+        if known is not None and size == known['size']:
+            return 0
+
+        # A last line without a line break is read again together with whatever was appended to it
+        self._drop(source, tail_only=True)
+        offset = known['offset'] if known is not None else None
+        rows = known['rows'] if known is not None else 0
+        parts, read = [], 0
+        for chunk, end, tail in _iter_csv_lines(csv_path, offset, required_columns):
+            parts.append(_year_city_summary(chunk, source, tail))
+            read += len(chunk)
+            if not tail:
+                offset = end
+                rows += len(chunk)
+        if offset is None:
+            # Header only: nothing folded in yet, start after the header next time
+            with open(csv_path, 'rb') as f:
+                offset = len(f.readline())
+
+        frames = [frame for frame in [self.summary] + parts if len(frame)]
+        if frames:
+            self.summary = _merge_summaries(frames)
+        self.state['sources'][source] = {'offset': offset,
+                                         'size': size,
+                                         'rows': rows,
+                                         'fingerprint': self._fingerprint(csv_path, offset),
+                                         'updated': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self._save()
+        return read
+
+    def aggregates(self, sources=None):
+        """
+        Chart aggregates built from the store alone
+        
+        Args:
+        sources (list): CSV paths to include (all sources in the store when None)
+        
+        Returns:
+        dict: Same structure as compute_aggregates, plus 'summary' (per year and city: entries, sowing and
+        last cut date ranges and the mean season length in days)
+        """
+        summary = self.summary
+        if sources is not None:
+            summary = summary[summary['source'].isin([os.path.abspath(path) for path in sources])]
+        summary = summary.assign(**{'Year of Harvest': _year_labels(summary['Year of Harvest'])})
+
+        counts = {
+            'year_counts': summary.groupby('Year of Harvest')['count'].sum(),
+            'city_counts': summary.groupby('City')['count'].sum(),
+            'year_city_counts': summary.groupby(['Year of Harvest', 'City'])['count'].sum(),
+            'rows': int(summary['count'].sum()),
+        }
+        aggregates = _finish_aggregates(counts)
+
+        by_year_city = _merge_summaries([summary], keys=['Year of Harvest', 'City'])
+        by_year_city = by_year_city.dropna(subset=['Year of Harvest', 'City'])
+        by_year_city['mean_season_days'] = by_year_city['season_days_sum'] / by_year_city['season_days_n'].where(
+            by_year_city['season_days_n'] > 0)
+        aggregates['summary'] = by_year_city.drop(columns=['season_days_sum', 'season_days_n']) \
+            .rename(columns={'count': 'entries'}).sort_values(['Year of Harvest', 'City']).reset_index(drop=True)
+        return aggregates
+
+def _save_png():
+    """Save the current matplotlib figure as PNG bytes and close it"""
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png')
+    plt.close()
+    return buf.getvalue()
+
+def render_bar_chart(year_counts):
+    """Bar Chart: Total entries by Year, as PNG bytes"""
+    plt.figure(figsize=(10, 6))
+    year_counts.plot(kind='bar')
+    plt.title('Total Entries by Year of Harvest')
+    plt.xlabel('Year')
+    plt.ylabel('Number of Entries')
+    plt.tight_layout()
+    return _save_png()
+
+def render_heatmap(pivot_data):
+    """Heatmap of Year and City, as PNG bytes"""
+    # Use seaborn to create a heatmap
+    import seaborn as sns
+    plt.figure(figsize=(12, 8))
+    sns.heatmap(pivot_data, annot=True, cmap='YlGnBu', fmt='g')
+    plt.title('Entries by Year and City')
+    plt.tight_layout()
+    return _save_png()
+
+def render_pie_chart(city_counts):
+    """Pie Chart: City Distribution, as PNG bytes"""
+    plt.figure(figsize=(10, 8))
+    plt.pie(city_counts, labels=city_counts.index, autopct='%1.1f%%')
+    plt.title('Distribution of Entries by City')
+    return _save_png()
+
+def _use_headless_backend():
+    """Render with the non-interactive Agg backend (used in the chart worker processes)"""
+    plt.switch_backend('Agg')
+
+def _render_chart(job):
+    renderer, data = job
+    return renderer(data)
+
+def render_chart_images(aggregates, parallel=False):
+    """
+    Render the bar chart, heatmap and pie chart PNGs
+    
+    Args:
+    aggregates (dict): Count tables from compute_aggregates
+    parallel (bool): Render the three figures at the same time in separate headless processes
+    
+    Returns:
+    list: PNG bytes of the bar chart, heatmap and pie chart
+    """
+    jobs = [(render_bar_chart, aggregates['year_counts']),
+            (render_heatmap, aggregates['pivot_data']),
+            (render_pie_chart, aggregates['city_counts'])]
+    if not parallel:
+        return [_render_chart(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=len(jobs), initializer=_use_headless_backend) as executor:
+        return list(executor.map(_render_chart, jobs))
+
+def _column_values(series):
+    """Python values of a column with missing entries as None, ready for XlsxWriter"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def _raw_data(df):
+    """The rows as read: dates that could not be parsed are put back as the text they were written as"""
+    raw = df.drop(columns=[col + RAW_DATE_SUFFIX for col in DATE_COLUMNS], errors='ignore')
+    for col in DATE_COLUMNS:
+        if col + RAW_DATE_SUFFIX in df.columns and df[col + RAW_DATE_SUFFIX].notna().any():
+            raw[col] = df[col].astype(object).where(df[col].notna(), df[col + RAW_DATE_SUFFIX])
+    return raw
+
+def _write_raw_data_streaming(workbook, df, block_rows=RAW_DATA_BLOCK_ROWS):
+    """Write the raw data sheet row by row, converting only `block_rows` rows at a time"""
+    worksheet = workbook.add_worksheet('Raw Data')
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    columns = _raw_data(df.iloc[:0]).columns
+    formats = [date_format if col in DATE_COLUMNS else None for col in columns]
+    worksheet.write_row(0, 0, [str(col) for col in columns], header_format)
+
+    for start in range(0, len(df), block_rows):
+        block = _raw_data(df.iloc[start:start + block_rows])
+        columns = [_column_values(block[col]) for col in block.columns]
+        for offset, row in enumerate(zip(*columns)):
+            for col, value in enumerate(row):
+                worksheet.write(start + offset + 1, col, value, formats[col])
+
+def _write_count_table(worksheet, header, labels, rows, first_col=0):
+    """Write a small aggregate table (header row, then label + values per row) and return its last row"""
+    worksheet.write_row(0, first_col, header)
+    for r, (label, values) in enumerate(zip(labels, rows), start=1):
+        worksheet.write(r, first_col, label)
+        worksheet.write_row(r, first_col + 1, values)
+    return len(labels)
+
+def _write_native_report(df, output_path, aggregates, png_charts):
+    """Fast export: streamed raw data and native Excel charts built from the aggregate tables"""
+    workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+    images = render_chart_images(aggregates, parallel=True) if png_charts else [None, None, None]
+
+    # Raw data first: in constant_memory mode every sheet is written top to bottom
+    if df is not None:
+        _write_raw_data_streaming(workbook, df)
+
+    # 1. Bar Chart: Total entries by Year
+    year_counts = aggregates['year_counts']
+    worksheet_bar = workbook.add_worksheet('Yearly Entries Chart')
+    last_row = _write_count_table(worksheet_bar, ['Year', 'Number of Entries'],
+                                  year_counts.index.tolist(), [[v] for v in year_counts.tolist()])
+    bar_chart = workbook.add_chart({'type': 'column'})
+    bar_chart.add_series({'name': 'Number of Entries',
+                          'categories': ['Yearly Entries Chart', 1, 0, last_row, 0],
+                          'values': ['Yearly Entries Chart', 1, 1, last_row, 1]})
+    bar_chart.set_title({'name': 'Total Entries by Year of Harvest'})
+    bar_chart.set_x_axis({'name': 'Year'})
+    bar_chart.set_y_axis({'name': 'Number of Entries'})
+    bar_chart.set_legend({'none': True})
+    worksheet_bar.insert_chart('D2', bar_chart, {'x_scale': 1.5, 'y_scale': 1.5})
+
+    # 2. Heatmap of Year and City: the pivot table with a color scale
+    pivot_data = aggregates['pivot_data']
+    worksheet_heatmap = workbook.add_worksheet('Year-City Heatmap')
+    heatmap_last_row = _write_count_table(worksheet_heatmap, ['Year of Harvest'] + pivot_data.columns.tolist(),
+                                          pivot_data.index.tolist(), pivot_data.values.tolist())
+    if heatmap_last_row and len(pivot_data.columns):
+        worksheet_heatmap.conditional_format(1, 1, heatmap_last_row, len(pivot_data.columns),
+                                             {'type': '3_color_scale',
+                                              'min_color': '#FFFFD9',
+                                              'mid_color': '#41B6C4',
+                                              'max_color': '#081D58'})
+
+    # 3. Pie Chart: City Distribution
+    city_counts = aggregates['city_counts']
+    worksheet_pie = workbook.add_worksheet('City Distribution')
+    last_row = _write_count_table(worksheet_pie, ['City', 'Number of Entries'],
+                                  city_counts.index.tolist(), [[v] for v in city_counts.tolist()])
+    pie_chart = workbook.add_chart({'type': 'pie'})
+    pie_chart.add_series({'name': 'Number of Entries',
+                          'categories': ['City Distribution', 1, 0, last_row, 0],
+                          'values': ['City Distribution', 1, 1, last_row, 1],
+                          'data_labels': {'percentage': True}})
+    pie_chart.set_title({'name': 'Distribution of Entries by City'})
+    worksheet_pie.insert_chart('D2', pie_chart, {'x_scale': 1.5, 'y_scale': 1.5})
+
+    # Optional PNG versions of the matplotlib/seaborn charts next to the native ones
+    bar_png, heatmap_png, pie_png = images
+    if bar_png:
+        worksheet_bar.insert_image('N2', 'bar_chart.png', {'image_data': io.BytesIO(bar_png)})
+    if heatmap_png:
+        worksheet_heatmap.insert_image(heatmap_last_row + 3, 1, 'heatmap.png',
+                                       {'image_data': io.BytesIO(heatmap_png)})
+    if pie_png:
+        worksheet_pie.insert_image('N2', 'pie_chart.png', {'image_data': io.BytesIO(pie_png)})
+
+    # 4. Per year and city summary (only present for aggregates from the aggregate store)
+    if 'summary' in aggregates:
+        summary = aggregates['summary']
+        worksheet_summary = workbook.add_worksheet('Year-City Summary')
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        worksheet_summary.write_row(0, 0, summary.columns.tolist())
+        columns = [_column_values(summary[col]) for col in summary.columns]
+        formats = [date_format if pd.api.types.is_datetime64_any_dtype(summary[col]) else None
+                   for col in summary.columns]
+        for r, row in enumerate(zip(*columns), start=1):
+            for col, value in enumerate(row):
+                worksheet_summary.write(r, col, value, formats[col])
+
+    workbook.close()
+
+def create_visualizations(df, output_path, aggregates=None, fast=False, png_charts=True):
+    """
+    Create visualizations of the data and add to Excel workbook
+    
+    Args:
+    df (pandas.DataFrame): DataFrame containing the data, or None to only write the charts
     output_path (str): Path to the output Excel file
+    aggregates (dict): Precomputed count tables (see compute_aggregates and AggregateStore.aggregates);
+        computed from df when not given
+    fast (bool): Native Excel charts and a streamed (constant memory) raw data sheet instead of images
+    png_charts (bool): In fast mode, also add the matplotlib/seaborn PNGs (rendered in parallel)
     """
+    if aggregates is None:
+        aggregates = compute_aggregates(df)
+
+    if fast:
+        _write_native_report(df, output_path, aggregates, png_charts)
+        print("Visualizations created and added to the Excel file.")
+        return
+
     # Create a Pandas Excel writer using XlsxWriter as the engine
-    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+    with pd.ExcelWriter(output_path, engine='xlsxwriter', date_format='yyyy-mm-dd',
+                        datetime_format='yyyy-mm-dd') as writer:
         # Write the dataframe to a sheet
-        df.to_excel(writer, sheet_name='Raw Data', index=False)
+        if df is not None:
+            _raw_data(df).to_excel(writer, sheet_name='Raw Data', index=False)
         workbook = writer.book
         
-        # 1. Bar Chart: Total entries by Year
-        plt.figure(figsize=(10, 6))
-        year_counts = df['Year of Harvest'].value_counts().sort_index()
-        ax = year_counts.plot(kind='bar')
-        plt.title('Total Entries by Year of Harvest')
-        plt.xlabel('Year')
-        plt.ylabel('Number of Entries')
-        plt.tight_layout()
-        
-        # Save bar chart to a BytesIO object
-        bar_chart_buf = io.BytesIO()
-        plt.savefig(bar_chart_buf, format='png')
-        bar_chart_buf.seek(0)
-        plt.close()
-        
-        # 2. Heatmap of Year and City
-        plt.figure(figsize=(12, 8))
-        pivot_data = df.pivot_table(index='Year of Harvest', 
-                                    columns='City', 
-                                    aggfunc='size', 
-                                    fill_value=0)
-        
-        # Use seaborn to create a heatmap
-        import seaborn as sns
-        sns.heatmap(pivot_data, annot=True, cmap='YlGnBu', fmt='g')
-        plt.title('Entries by Year and City')
-        plt.tight_layout()
-        
-        # Save heatmap to a BytesIO object
-        heatmap_buf = io.BytesIO()
-        plt.savefig(heatmap_buf, format='png')
-        heatmap_buf.seek(0)
-        plt.close()
-        
-        # 3. Pie Chart: City Distribution
-        plt.figure(figsize=(10, 8))
-        city_counts = df['City'].value_counts()
-        plt.pie(city_counts, labels=city_counts.index, autopct='%1.1f%%')
-        plt.title('Distribution of Entries by City')
-        
-        # Save pie chart to a BytesIO object
-        pie_chart_buf = io.BytesIO()
-        plt.savefig(pie_chart_buf, format='png')
-        pie_chart_buf.seek(0)
-        plt.close()
+        bar_chart_png, heatmap_png, pie_chart_png = render_chart_images(aggregates)
         
         # Add images to worksheets
         # Yearly Entries Bar Chart
         worksheet_bar = workbook.add_worksheet('Yearly Entries Chart')
-        worksheet_bar.insert_image('B2', 'bar_chart.png', {'image_data': bar_chart_buf})
+        worksheet_bar.insert_image('B2', 'bar_chart.png', {'image_data': io.BytesIO(bar_chart_png)})
         
         # Year-City Heatmap
         worksheet_heatmap = workbook.add_worksheet('Year-City Heatmap')
-        worksheet_heatmap.insert_image('B2', 'heatmap.png', {'image_data': heatmap_buf})
+        worksheet_heatmap.insert_image('B2', 'heatmap.png', {'image_data': io.BytesIO(heatmap_png)})
         
         # City Distribution Pie Chart
         worksheet_pie = workbook.add_worksheet('City Distribution')
-        worksheet_pie.insert_image('B2', 'pie_chart.png', {'image_data': pie_chart_buf})
+        worksheet_pie.insert_image('B2', 'pie_chart.png', {'image_data': io.BytesIO(pie_chart_png)})
+        
+        # Per year and city summary (only present for aggregates from the aggregate store)
+        if 'summary' in aggregates:
+            aggregates['summary'].to_excel(writer, sheet_name='Year-City Summary', index=False)
     
     print("Visualizations created and added to the Excel file.")
 
@@ -98,22 +611,43 @@ def analyze_csv():
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV file not found at {csv_path}")
         
-        # Read the CSV file
-        df = pd.read_csv(csv_path)
+        # Validate column existence from the header alone
+        validate_csv_header(csv_path)
+        
+        output_path = 'selected_data_with_charts.xlsx'
         
-        # Validate column existence
-        required_columns = ['Year of Harvest', 'City', 'Date Sown', 'Date of Cut (Last Cut)']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        # Optional: FAST_EXPORT=1 writes native Excel charts and streams the raw data sheet;
+        # PNG_CHARTS=0 then leaves out the matplotlib/seaborn images
+        fast = os.getenv('FAST_EXPORT', '0') == '1'
+        png_charts = os.getenv('PNG_CHARTS', '1') == '1'
         
-        if missing_columns:
-            raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+        # Optional: AGGREGATE_STORE=<dir> keeps the count tables between runs and only folds in
+        # rows appended to the CSV since the last run; the charts are drawn from the store alone
+        store_dir = os.getenv('AGGREGATE_STORE')
+        if store_dir:
+            store = AggregateStore(store_dir)
+            added = store.update(csv_path)
+            aggregates = store.aggregates([csv_path])
+            create_visualizations(None, output_path, aggregates, fast=fast, png_charts=png_charts)
+            print(f"Analysis complete. Charts exported to {output_path} from the aggregate store "
+                  f"({added} new rows folded in, raw data sheet skipped)")
+            print(f"Total rows analyzed: {aggregates['rows']}")
+            return
         
-        # Select only the required columns
-        selected_df = df[required_columns]
+        # Optional: stream the CSV in chunks (CSV_CHUNKSIZE rows) for files larger than memory
+        chunksize = os.getenv('CSV_CHUNKSIZE')
+        if chunksize:
+            aggregates = aggregate_chunks(iter_required_columns(csv_path, int(chunksize)))
+            create_visualizations(None, output_path, aggregates, fast=fast, png_charts=png_charts)
+            print(f"Analysis complete. Charts exported to {output_path} (raw data sheet skipped in chunked mode)")
+            print(f"Total rows analyzed: {aggregates['rows']}")
+            return
+        
+        # Read only the required columns
+        selected_df = read_required_columns(csv_path)
         
         # Create output Excel file with visualizations
-        output_path = 'selected_data_with_charts.xlsx'
-        create_visualizations(selected_df, output_path)
+        create_visualizations(selected_df, output_path, fast=fast, png_charts=png_charts)
         
         print(f"Analysis complete. Data exported to {output_path}")
         print(f"Total rows exported: {len(selected_df)}")
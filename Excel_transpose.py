@@ -1,34 +1,196 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-# Load the Excel file
-file_path = "Lexington_(2001-2024)_Temp_Prep.xlsx"
-df = pd.read_excel(file_path, sheet_name="Lexington_(2001-2024)_Temp_Prep", skiprows=6)
+# Station workbook processed when no paths are given
+DEFAULT_WORKBOOK = "Lexington_(2001-2024)_Temp_Prep.xlsx"
+# Parsed workbooks are cached here as Parquet, so each workbook is only read with openpyxl once
+CACHE_DIR = ".climate_cache"
+
+def station_name(file_path):
+    """'Lexington_(2001-2024)_Temp_Prep.xlsx' -> 'Lexington'"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return stem.split("_(")[0]
+
+def data_sheet_name(file_path):
+    """The sheet named after the workbook; Excel cuts sheet names at 31 characters, and workbooks without
+    such a sheet fall back to their first sheet."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    with pd.ExcelFile(file_path) as workbook:
+        sheet_names = workbook.sheet_names
+    for name in [stem, stem[:31]]:
+        if name in sheet_names:
+            return name
+    return sheet_names[0]
+
+def parse_station_workbook(file_path, sheet_name=None):
+    """Loads a station workbook and returns its cleaned rows with a datetime 'Date' column."""
+    # The data sheet is named after the workbook unless told otherwise
+    if sheet_name is None:
+        sheet_name = data_sheet_name(file_path)
+    df = pd.read_excel(file_path, sheet_name=sheet_name, skiprows=6)
+
+    # Set proper headers and drop metadata rows
+    df.columns = df.iloc[1]
+    df = df[2:].reset_index(drop=True)
+
+    # Rename first column to 'Date' (and use string headers, which Parquet requires)
+    df.columns = ['Date'] + [str(c) for c in df.columns[1:]]
+
+    # Remove rows where 'Date' is NaN or clearly not a date (like 'Sum:')
+    df = df[df['Date'].notna()]  # Remove NaN rows
+    df = df[~df['Date'].astype(str).str.contains("Sum", case=False)]  # Remove 'Sum:' or similar
+
+    # Convert to datetime
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+
+    # Drop any rows where datetime conversion failed
+    df = df[df['Date'].notna()]
+
+    # Measurements keep their raw values: codes such as 'T' (trace) or 'M' (missing) stay in the output.
+    # Columns of plain numbers get a numeric dtype, columns with codes stay object
+    return df.reset_index(drop=True).infer_objects()
+
+def numeric_measurements(df):
+    """Copy of a cleaned frame with the measurements as numbers; codes such as 'T' or 'M' become NaN."""
+    df = df.copy()
+    value_columns = df.columns[1:]
+    df[value_columns] = df[value_columns].apply(pd.to_numeric, errors='coerce')
+    return df
+
+def _text_columns(df):
+    """Measurement columns that mix numbers and codes; numeric columns keep their dtype in Parquet."""
+    return [column for column in df.columns[1:] if df[column].dtype == object]
+
+def _measurements_as_text(df, text_columns):
+    # Mixed columns are stored as text in the Parquet cache, for a stable schema
+    df = df.copy()
+    for column in text_columns:
+        df[column] = df[column].map(lambda value: None if pd.isna(value) else str(value))
+    return df
+
+def _value_from_text(text):
+    if text is None:
+        return np.nan
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+def _measurements_from_text(df, text_columns):
+    # Ints, floats and codes come back as the Python values a fresh parse gives
+    for column in text_columns:
+        df[column] = df[column].astype(object).map(_value_from_text).astype(object)
+    return df
+
+def _file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cached_station_frame(file_path, cache_dir=CACHE_DIR, sheet_name=None):
+    """
+    Returns (cleaned frame, parsed) for a station workbook. The workbook is only parsed when it is new or
+    changed; otherwise the Parquet copy in `cache_dir` is read.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    parquet_path = os.path.join(cache_dir, stem + ".parquet")
+    meta_path = os.path.join(cache_dir, stem + ".json")
+
+    stat = os.stat(file_path)
+    meta = {"source": os.path.abspath(file_path), "sheet_name": sheet_name,
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if os.path.exists(parquet_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            cached = json.load(f)
+        same_file = (cached.get("source") == meta["source"] and cached.get("sheet_name") == sheet_name
+                     and "text_columns" in cached)
+        # Unchanged size and mtime: trust the cache without reading the workbook at all
+        if same_file and cached.get("size") == meta["size"] and cached.get("mtime_ns") == meta["mtime_ns"]:
+            return _measurements_from_text(pd.read_parquet(parquet_path), cached["text_columns"]), False
+        # Touched but identical content (e.g. copied again): refresh the stamp, keep the cache
+        if same_file and cached.get("sha256") == _file_hash(file_path):
+            cached.update(size=meta["size"], mtime_ns=meta["mtime_ns"])
+            with open(meta_path, "w") as f:
+                json.dump(cached, f)
+            return _measurements_from_text(pd.read_parquet(parquet_path), cached["text_columns"]), False
 
-# Set proper headers and drop metadata rows
-df.columns = df.iloc[1]
-df = df[2:].reset_index(drop=True)
+    df = parse_station_workbook(file_path, sheet_name)
+    meta["text_columns"] = _text_columns(df)
+    _measurements_as_text(df, meta["text_columns"]).to_parquet(parquet_path, index=False)
+    meta["sha256"] = _file_hash(file_path)
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return df, True
 
-# Rename first column to 'Date'
-df.rename(columns={df.columns[0]: 'Date'}, inplace=True)
+def transpose_station(df):
+    """Dates become the columns (formatted as YYYY-MM) and measurements the rows."""
+    df_transposed = df.set_index('Date').transpose()
+    df_transposed.columns = df_transposed.columns.strftime("%Y-%m")
+    return df_transposed
 
-# Remove rows where 'Date' is NaN or clearly not a date (like 'Sum:')
-df = df[df['Date'].notna()]  # Remove NaN rows
-df = df[~df['Date'].astype(str).str.contains("Sum", case=False)]  # Remove 'Sum:' or similar
+def process_workbook(file_path, output_dir="", cache_dir=CACHE_DIR, sheet_name=None):
+    """Parses (or loads from cache) one station workbook and writes '<workbook name>_Transposed.xlsx'."""
+    df, parsed = cached_station_frame(file_path, cache_dir, sheet_name)
+    # Named after the whole workbook: a station can have several (other years, Temp and Prep files)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    output_path = os.path.join(output_dir, stem + "_Transposed.xlsx")
+    transpose_station(df).to_excel(output_path)
+    return output_path, parsed
 
-# Convert to datetime
-df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+def _process_workbook_safe(args):
+    file_path, output_dir, cache_dir, sheet_name = args
+    try:
+        return file_path, process_workbook(file_path, output_dir, cache_dir, sheet_name), None
+    except Exception as e:
+        return file_path, None, e
 
-# Drop any rows where datetime conversion failed
-df = df[df['Date'].notna()]
+def expand_paths(patterns):
+    """Expands glob patterns and directories into a sorted list of workbook paths."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.xlsx")
+        matches = glob.glob(pattern)
+        paths += matches if matches else [pattern]
+    # Skip our own outputs and Excel lock files when a whole folder is given
+    return sorted(p for p in set(paths)
+                  if not os.path.basename(p).startswith("~$") and not p.endswith("_Transposed.xlsx"))
 
-# Set date as index and transpose
-df.set_index('Date', inplace=True)
-df_transposed = df.transpose()
+def main():
+    parser = argparse.ArgumentParser(description="Clean and transpose station climate workbooks (dates -> YYYY-MM columns).")
+    parser.add_argument("workbooks", nargs="*", default=[DEFAULT_WORKBOOK],
+                        help="Workbooks, folders or glob patterns (default: the Lexington workbook).")
+    parser.add_argument("--sheet", default=None, help="Sheet to read (default: sheet named like the workbook).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Workbooks processed in parallel.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Where parsed workbooks are cached as Parquet.")
+    parser.add_argument("--output-dir", default="", help="Where the transposed workbooks are written.")
+    args = parser.parse_args()
 
-# Format dates as YYYY-MM for column headers
-df_transposed.columns = [d.strftime("%Y-%m") for d in df_transposed.columns]
+    file_paths = expand_paths(args.workbooks)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
 
-# Save to Excel
-df_transposed.to_excel("Lexington_Transposed.xlsx")
+    jobs = [(path, args.output_dir, args.cache_dir, args.sheet) for path in file_paths]
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs) or 1))) as executor:
+        for file_path, result, error in executor.map(_process_workbook_safe, jobs):
+            if error is not None:
+                print(f"❌ An error occurred while processing {file_path}:", error)
+                continue
+            output_path, parsed = result
+            source = "parsed" if parsed else "from cache"
+            print(f"✅ Cleaned, transposed file saved as '{output_path}' ({source})")
 
-print("✅ Cleaned, transposed file saved as 'Lexington_Transposed.xlsx'")
+if __name__ == "__main__":
+    main()
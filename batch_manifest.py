@@ -0,0 +1,240 @@
+# Headless version of the img2table scripts: every option that tb_img2_v1/v2/v3 ask for with input()
+# is read from a JSON/YAML manifest instead, so a whole batch of reports can run unattended.
+#
+# Example manifest (JSON; the same structure works in YAML):
+#
+# {
+#   "lang": "eng",
+#   "workers": 4,
+#   "output_dir": "extracted",
+#   "cache_dir": ".extraction_cache",
+#   "text_layer": true,
+#   "adaptive_dpi": true,
+#   "ocr_backend": "auto",
+#   "ocr_threads": 1,
+#   "ocr_batch_size": 4,
+#   "output_format": "parquet",
+#   "dataset_dir": "extracted_tables",
+#   "journal": "extraction_journal.jsonl",
+#   "retries": 2,
+#   "defaults": {"borderless_tables": false, "implicit_rows": false, "implicit_columns": false},
+#   "files": [
+#     {"path": "Kentucky_2019.pdf", "pages": "3-9", "portrait": "4,5"},
+#     {"path": "California_2020.pdf", "pages": "all",
+#      "borderless_tables": true, "implicit_rows": true, "implicit_columns": true},
+#     {"path": "Kentucky_2020.pdf", "pages": "2-3", "portrait": "3",
+#      "page_options": {"3": {"implicit_rows": true}}},
+#     {"path": "Kentucky_2021.pdf", "pages": "1-40", "orientation": "auto", "landscape": "12"},
+#     {"path": "scan.png"}
+#   ]
+# }
+#
+# "pages" selects the pages of a PDF (same syntax as the interactive prompts, or "all"), "portrait" marks
+# the selected pages that need rotating, and every other selected page is extracted as landscape.
+# With "orientation": "auto" the pages are classified automatically ("orientation_method": "profile" or
+# "osd"), and "portrait"/"landscape" only override the detected orientation of the pages they list.
+# Extraction flags are taken from "defaults", then the file entry, then "page_options" for that page.
+# Results are cached in "cache_dir" (set it to null to disable the cache). Digital PDF pages are read from
+# their text layer unless "text_layer" is false, in which case every page is rendered and OCR'd.
+# Scanned pages only have their table regions OCR'd, at a resolution fitted to their text, unless
+# "adaptive_dpi" is false. "ocr_backend", "ocr_threads" and "ocr_batch_size" choose the OCR engine
+# (see warm_ocr); every worker process keeps its own warm Tesseract models for the whole run.
+# "output_format" is "xlsx" (default), "parquet" (one consolidated dataset in "dataset_dir") or "both".
+# With a "journal" every finished page is recorded durably: running the manifest again after a crash or
+# Ctrl-C skips the pages already done, and failed pages are retried "retries" times with backoff.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from extraction_cache import DEFAULT_CACHE_DIR, ExtractionCache
+from job_journal import JobJournal
+from table_dataset import DEFAULT_DATASET_DIR
+from warm_ocr import configure as configure_ocr
+from page_orientation import apply_overrides, detect_orientations
+from pipeline_profiler import configure as configure_profiling, load as load_profile, print_summary
+from tb_img2_v3 import (IMAGE_EXTENSIONS, MAX_PAGES_IN_MEMORY, PageTask, build_pdf_tasks,
+                        extraction_options, get_pdf_page_count, parse_page_numbers, run_resumable,
+                        run_tasks, write_results)
+
+OPTION_KEYS = ["implicit_rows", "implicit_columns", "borderless_tables", "min_confidence"]
+
+def load_manifest(manifest_path):
+    """Reads a JSON or YAML manifest into a dict."""
+    ext = os.path.splitext(manifest_path)[1].lower()
+    with open(manifest_path, encoding="utf-8") as f:
+        if ext in [".yaml", ".yml"]:
+            if yaml is None:
+                raise ImportError("PyYAML is required to read YAML manifests (pip install pyyaml)")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), list):
+        raise ValueError(f"Manifest {manifest_path} must contain a 'files' list")
+    return manifest
+
+def _pick_options(entry):
+    return {key: entry[key] for key in OPTION_KEYS if key in entry}
+
+def _page_spec(spec, total_pages, missing=()):
+    """Turns a manifest page spec ('1,3,5-7', 'all', a number or a list of them) into page numbers.
+    A missing spec (None) gives `missing`; an empty one gives no pages."""
+    if spec is None:
+        return list(missing)
+    if isinstance(spec, list):
+        spec = ",".join(str(part) for part in spec)
+    spec = str(spec).strip()
+    if not spec:
+        return []
+    if spec.lower() == "all":
+        return list(range(1, total_pages + 1))
+    return parse_page_numbers(spec, total_pages)
+
+def plan_manifest_entry(entry, base_dir=""):
+    """Returns the page tasks described by one manifest file entry, and the detected page orientations
+    (as dicts) when the entry asks for automatic orientation."""
+    file_path = os.path.join(base_dir, entry["path"])
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found at {file_path}")
+
+    file_options = _pick_options(entry)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return [PageTask(file_path, "image", None, file_options or None)], []
+    if ext != ".pdf":
+        raise ValueError(f"Unsupported file type: {file_path}")
+
+    total_pages = get_pdf_page_count(file_path)
+    selected_pages = _page_spec(entry.get("pages"), total_pages, missing=range(1, total_pages + 1))
+    portrait_pages = [p for p in _page_spec(entry.get("portrait"), total_pages) if p in selected_pages]
+    landscape_pages = [p for p in selected_pages if p not in portrait_pages]
+    rotations, orientations = {}, []
+
+    if entry.get("orientation") == "auto":
+        forced_landscape = _page_spec(entry.get("landscape"), total_pages)
+        detected = detect_orientations(file_path, selected_pages, method=entry.get("orientation_method", "profile"))
+        detected = apply_overrides(detected, portrait_pages, forced_landscape)
+        portrait_pages = [o.page for o in detected if o.orientation == "portrait"]
+        landscape_pages = [o.page for o in detected if o.orientation == "landscape"]
+        rotations = {o.page: o.rotation for o in detected if o.orientation == "portrait"}
+        orientations = [dict(o._asdict(), file=file_path) for o in detected]
+
+    page_options = {int(page): _pick_options(opts) for page, opts in entry.get("page_options", {}).items()}
+    tasks = []
+    for task in build_pdf_tasks(file_path, portrait_pages, landscape_pages, rotations):
+        options = {**file_options, **page_options.get(task.page, {})}
+        tasks.append(task._replace(options=options or None))
+    return tasks, orientations
+
+def run_manifest(manifest_path, summary_path=None, workers=None, max_pages_in_memory=MAX_PAGES_IN_MEMORY,
+                 journal_path=None, retries=None):
+    """Runs every file of a manifest and returns (and optionally writes) a JSON-serializable summary.
+    `journal_path` and `retries` override the manifest's "journal" and "retries"."""
+    manifest = load_manifest(manifest_path)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    output_dir = os.path.join(base_dir, manifest.get("output_dir", ""))
+    os.makedirs(output_dir, exist_ok=True)
+
+    defaults = manifest.get("defaults", {})
+    options = extraction_options(defaults.get("implicit_rows", False),
+                                 defaults.get("implicit_columns", False),
+                                 defaults.get("borderless_tables", False),
+                                 defaults.get("min_confidence", 50))
+    workers = workers or manifest.get("workers", 1)
+    cache_dir = manifest.get("cache_dir", DEFAULT_CACHE_DIR)
+    cache = ExtractionCache(os.path.join(base_dir, cache_dir)) if cache_dir else None
+    configure_ocr(manifest.get("ocr_backend"), manifest.get("ocr_threads"), manifest.get("ocr_batch_size"))
+    started = time.time()
+
+    tasks, records, orientations = [], [], []
+    for entry in manifest["files"]:
+        try:
+            entry_tasks, entry_orientations = plan_manifest_entry(entry, base_dir)
+            tasks += entry_tasks
+            orientations += entry_orientations
+        except Exception as e:
+            print(f"❌ Skipping {entry.get('path')}:", e)
+            records.append({"file": entry.get("path"), "kind": None, "page": None, "output": None,
+                            "tables": 0, "status": "error", "error": str(e)})
+
+    run_kwargs = {"lang": manifest.get("lang", "eng"),
+                  "workers": workers,
+                  "max_pages_in_memory": max_pages_in_memory,
+                  "cache": cache,
+                  "text_layer": manifest.get("text_layer", True),
+                  "adaptive_dpi": manifest.get("adaptive_dpi", True)}
+    output_format = manifest.get("output_format", "xlsx")
+    dataset_dir = os.path.join(base_dir, manifest.get("dataset_dir", DEFAULT_DATASET_DIR))
+    journal_path = journal_path or manifest.get("journal")
+    report = None
+    if journal_path:
+        settings = {"options": options, "lang": run_kwargs["lang"], "text_layer": run_kwargs["text_layer"],
+                    "adaptive_dpi": run_kwargs["adaptive_dpi"],
+                    "output_format": output_format, "output_dir": output_dir, "dataset_dir": dataset_dir}
+        journal = JobJournal(os.path.join(base_dir, journal_path), settings)
+        records += run_resumable(tasks, options, journal, output_dir, output_format, dataset_dir,
+                                 retries=manifest.get("retries", 2) if retries is None else retries,
+                                 backoff=manifest.get("retry_backoff", 5.0),
+                                 **run_kwargs)
+        report = journal.write_report(tasks)
+    else:
+        records += write_results(run_tasks(tasks, options, **run_kwargs),
+                                 output_dir=output_dir,
+                                 output_format=output_format,
+                                 dataset_dir=dataset_dir)
+
+    summary = {"manifest": os.path.abspath(manifest_path),
+               "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+               "elapsed_seconds": round(time.time() - started, 3),
+               "tasks": len(records),
+               "succeeded": sum(r["status"] == "success" for r in records),
+               "failed": sum(r["status"] == "error" for r in records),
+               "tables": sum(r["tables"] for r in records),
+               "results": records,
+               "orientations": orientations}
+    if report is not None:
+        summary["journal"] = report
+
+    if summary_path:
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {summary_path}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract tables from the files listed in a JSON/YAML manifest.")
+    parser.add_argument("manifest", help="Path to the JSON or YAML manifest.")
+    parser.add_argument("--summary", default="batch_summary.json", help="Where to write the JSON run summary.")
+    parser.add_argument("--workers", type=int, default=None, help="Overrides the manifest's worker count.")
+    parser.add_argument("--max-pages-in-memory", type=int, default=MAX_PAGES_IN_MEMORY,
+                        help="Maximum number of rendered pages each process keeps in memory.")
+    parser.add_argument("--journal", default=None,
+                        help="Job journal (JSON lines); overrides the manifest's. Re-runs skip finished pages.")
+    parser.add_argument("--retries", type=int, default=None, help="Overrides the manifest's retry count.")
+    parser.add_argument("--profile-log", default=None,
+                        help="Append per-stage wall/CPU time and peak RSS as JSON lines to this file.")
+    args = parser.parse_args()
+
+    configure_profiling(args.profile_log)
+    try:
+        summary = run_manifest(args.manifest, args.summary, args.workers, args.max_pages_in_memory,
+                               args.journal, args.retries)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Run the manifest again with the same journal to continue where it stopped.")
+        sys.exit(130)
+    print(f"Done: {summary['succeeded']} of {summary['tasks']} page tasks succeeded, {summary['tables']} tables extracted.")
+    if args.profile_log and os.path.exists(args.profile_log):
+        print_summary(load_profile(args.profile_log))
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Synthetic fixtures for the benchmarks, generated locally so the suite runs offline:
+# table PDFs with a real text layer (bordered, borderless, portrait-rotated), scanned (raster) table PDFs,
+# harvest CSVs and station climate workbooks laid out like the real inputs.
+
+import os
+
+import numpy as np
+import pandas as pd
+from PIL import Image as PILImage, ImageDraw
+
+CITIES = ["Lexington", "Princeton", "Quicksand", "Davis", "Five Points", "Tulelake", "Bowling Green"]
+VARIETIES = ["Bulldog 805", "FSG 528SF", "Gunner", "Hi-Gest 360", "Liberator", "Vernal", "WL 354HQ"]
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter in PDF points
+
+def yield_table(rows, seed=0):
+    """A yield-trial style table: header row plus `rows` variety rows."""
+    rng = np.random.default_rng(seed)
+    header = ["Variety", "Cut 1", "Cut 2", "Cut 3", "Cut 4", "Total"]
+    body = []
+    for i in range(rows):
+        cuts = rng.uniform(0.8, 2.2, size=4).round(2)
+        body.append([VARIETIES[i % len(VARIETIES)] + (f" {i // len(VARIETIES)}" if i >= len(VARIETIES) else "")]
+                    + [f"{c:.2f}" for c in cuts] + [f"{cuts.sum():.2f}"])
+    return [header] + body
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _table_ops(table, bordered, portrait):
+    """PDF content stream drawing a table; portrait tables are drawn rotated by 90 degrees."""
+    col_width, row_height, font_size = 80, 18, 9
+    n_rows, n_cols = len(table), len(table[0])
+    ops = []
+    # Portrait tables run bottom-to-top along the page, like a landscape table printed on a portrait page
+    if portrait:
+        ops.append("q 0 1 -1 0 60 60 cm")
+    else:
+        ops.append(f"q 1 0 0 1 50 {PAGE_HEIGHT - 80} cm")
+    for r, row in enumerate(table):
+        for c, text in enumerate(row):
+            ops.append(f"BT /F1 {font_size} Tf {c * col_width + 4} {-(r + 1) * row_height + 5} Td ({_escape(text)}) Tj ET")
+    if bordered:
+        ops.append("0.5 w")
+        for r in range(n_rows + 1):
+            ops.append(f"0 {-r * row_height} m {n_cols * col_width} {-r * row_height} l S")
+        for c in range(n_cols + 1):
+            ops.append(f"{c * col_width} 0 m {c * col_width} {-n_rows * row_height} l S")
+    ops.append("Q")
+    return "\n".join(ops)
+
+def write_text_pdf(path, pages):
+    """Writes a minimal PDF whose pages are the given content streams (Helvetica as /F1)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for content in pages:
+        data = content.encode("latin-1")
+        objects.append(f"<< /Length {len(data)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+def make_text_pdf(path, n_pages, bordered=True, portrait=False, rows=25):
+    """Digital (text layer) report with one table per page."""
+    write_text_pdf(path, [_table_ops(yield_table(rows, seed=p), bordered, portrait) for p in range(n_pages)])
+    return path
+
+def table_image(rows=25, dpi=200, bordered=True, seed=0):
+    """Raster image of a table on a letter-size page, like a scanned report page."""
+    scale = dpi / 72
+    image = PILImage.new("L", (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    col_width, row_height = 80 * scale, 18 * scale
+    x0, y0 = 50 * scale, 80 * scale
+    table = yield_table(rows, seed)
+    for r, row in enumerate(table):
+        for c, text in enumerate(row):
+            draw.text((x0 + c * col_width + 4 * scale, y0 + r * row_height + 4 * scale), text, fill=0)
+    if bordered:
+        for r in range(len(table) + 1):
+            draw.line([(x0, y0 + r * row_height), (x0 + len(table[0]) * col_width, y0 + r * row_height)], fill=0)
+        for c in range(len(table[0]) + 1):
+            draw.line([(x0 + c * col_width, y0), (x0 + c * col_width, y0 + len(table) * row_height)], fill=0)
+    return image
+
+def make_scanned_pdf(path, n_pages, bordered=True, portrait=False, dpi=200):
+    """Raster-only report (no text layer); portrait pages hold the table rotated by 90 degrees."""
+    pages = []
+    for p in range(n_pages):
+        image = table_image(dpi=dpi, bordered=bordered, seed=p)
+        if portrait:
+            image = image.rotate(90, expand=True)
+        pages.append(image.convert("RGB"))
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=dpi)
+    return path
+
+def make_harvest_csv(path, n_rows, seed=0):
+    """Harvest records with the columns analyze_csv needs plus a few it ignores."""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(2001, 2025, size=n_rows)
+    sown = pd.to_datetime(pd.DataFrame({"year": years - 1, "month": 8, "day": 15})) \
+        + pd.to_timedelta(rng.integers(0, 40, size=n_rows), unit="D")
+    last_cut = pd.to_datetime(pd.DataFrame({"year": years, "month": 9, "day": 1})) \
+        + pd.to_timedelta(rng.integers(0, 40, size=n_rows), unit="D")
+    pd.DataFrame({
+        "Variety": rng.choice(VARIETIES, size=n_rows),
+        "Year of Harvest": years,
+        "City": rng.choice(CITIES, size=n_rows),
+        "State": rng.choice(["KY", "CA"], size=n_rows),
+        "Date Sown": sown.dt.strftime("%m/%d/%Y"),
+        "Date of Cut (Last Cut)": last_cut.dt.strftime("%m/%d/%Y"),
+        "Yield (t/a)": rng.uniform(2, 10, size=n_rows).round(2),
+        "Notes": "synthetic",
+    }).to_csv(path, index=False)
+    return path
+
+def make_station_workbook(path, start_year=2001, end_year=2024, seed=0):
+    """Daily station workbook in the layout Excel_transpose expects (6 preamble rows, header on the 9th row,
+    a 'Sum:' row after every month) with the data sheet named like the file."""
+    import xlsxwriter
+
+    rng = np.random.default_rng(seed)
+    sheet_name = os.path.splitext(os.path.basename(path))[0][:31]
+    workbook = xlsxwriter.Workbook(path)
+    worksheet = workbook.add_worksheet(sheet_name)
+    date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+    for r in range(6):
+        worksheet.write(r, 0, f"Station metadata line {r + 1}")
+    worksheet.write_row(6, 0, ["Report", "", "", ""])
+    worksheet.write_row(7, 0, ["Daily values", "", "", ""])
+    worksheet.write_row(8, 0, ["Date", "Max Temp", "Min Temp", "Precipitation"])
+
+    row = 9
+    for month_start in pd.date_range(f"{start_year}-01-01", f"{end_year}-12-01", freq="MS"):
+        days = pd.date_range(month_start, month_start + pd.offsets.MonthEnd(0), freq="D")
+        seasonal = 55 + 25 * np.sin((days.dayofyear.to_numpy() - 100) / 365 * 2 * np.pi)
+        tmax = (seasonal + 10 + rng.normal(0, 5, len(days))).round(1)
+        tmin = (seasonal - 10 + rng.normal(0, 5, len(days))).round(1)
+        precip = np.clip(rng.exponential(0.12, len(days)) - 0.05, 0, None).round(2)
+        for day, hi, lo, pr in zip(days, tmax, tmin, precip):
+            worksheet.write_datetime(row, 0, day.to_pydatetime(), date_format)
+            worksheet.write_row(row, 1, [float(hi), float(lo), float(pr)])
+            row += 1
+        worksheet.write_row(row, 0, ["Sum:", "", "", float(precip.sum().round(2))])
+        row += 1
+    workbook.close()
+    return path
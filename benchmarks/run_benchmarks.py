@@ -0,0 +1,338 @@
+# Offline benchmark suite for the extraction, charting and climate pipelines.
+#
+# Fixtures are generated locally (see fixtures.py), every stage is timed at several data sizes, and each
+# measurement is appended to benchmarks/history.jsonl together with the git commit, so pages/second and
+# rows/second can be compared across commits and regressions are flagged.
+#
+#   python benchmarks/run_benchmarks.py                         -> small + medium sizes, all stages
+#   python benchmarks/run_benchmarks.py --sizes large --stages csv charts
+#   python benchmarks/run_benchmarks.py --fail-on-regression    -> exit code 1 when a stage got slower
+#   python benchmarks/run_benchmarks.py --report                -> latest results vs. baseline, no run
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402  (benchmarks/ is on sys.path when this file runs as a script)
+
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixture_data")
+HISTORY_PATH = os.path.join(ROOT, "benchmarks", "history.jsonl")
+
+SIZES = {
+    "small": {"pages": 2, "ocr_pages": 1, "csv_rows": 10_000, "stations": 1, "years": (2020, 2024)},
+    "medium": {"pages": 8, "ocr_pages": 2, "csv_rows": 200_000, "stations": 4, "years": (2001, 2024)},
+    "large": {"pages": 32, "ocr_pages": 4, "csv_rows": 2_000_000, "stations": 12, "years": (2001, 2024)},
+}
+
+def fixture(name, builder, *args, **kwargs):
+    """Path of a generated fixture, building it only the first time."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, name)
+    if not os.path.exists(path):
+        builder(path, *args, **kwargs)
+    return path
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def has_poppler():
+    return shutil.which("pdftoppm") is not None and shutil.which("pdfinfo") is not None
+
+def has_tesseract():
+    return shutil.which("tesseract") is not None
+
+# Every benchmark returns (run, units, unit name, available); only run() is timed.
+
+def bench_pdf_render(size):
+    from tb_img2_v3 import PageRenderer
+    path = fixture(f"scanned_{size['pages']}p.pdf", fixtures.make_scanned_pdf, size["pages"])
+
+    def run():
+        renderer = PageRenderer(path)
+        for page in range(1, size["pages"] + 1):
+            renderer.render(page)
+            renderer.release(page)
+    return run, size["pages"], "pages", has_poppler()
+
+def bench_pdf_orientation(size):
+    from page_orientation import detect_orientations
+    path = fixture(f"scanned_portrait_{size['pages']}p.pdf", fixtures.make_scanned_pdf, size["pages"], portrait=True)
+    return (lambda: detect_orientations(path, range(1, size["pages"] + 1)),
+            size["pages"], "pages", has_poppler())
+
+def bench_pdf_text_layer(size):
+    from text_layer import extract_page_tables
+    bordered = fixture(f"text_bordered_{size['pages']}p.pdf", fixtures.make_text_pdf, size["pages"])
+    borderless = fixture(f"text_borderless_{size['pages']}p.pdf", fixtures.make_text_pdf, size["pages"],
+                         bordered=False)
+    portrait = fixture(f"text_portrait_{size['pages']}p.pdf", fixtures.make_text_pdf, size["pages"], portrait=True)
+
+    def run():
+        for path, borderless_tables in [(bordered, False), (borderless, True), (portrait, False)]:
+            for page in range(1, size["pages"] + 1):
+                extract_page_tables(path, page, borderless_tables)
+    return run, 3 * size["pages"], "pages", True
+
+def _extract_pages(path, kind, pages, borderless):
+    from tb_img2_v3 import PageTask, extraction_options, run_tasks
+    options = extraction_options(False, False, borderless)
+    tasks = [PageTask(path, kind, page) for page in pages]
+    for _, _, error in run_tasks(tasks, options, text_layer=False):
+        if error is not None:
+            raise error
+
+def bench_pdf_ocr(size):
+    pages = range(1, size["ocr_pages"] + 1)
+    bordered = fixture(f"scanned_{size['pages']}p.pdf", fixtures.make_scanned_pdf, size["pages"])
+    portrait = fixture(f"scanned_portrait_{size['pages']}p.pdf", fixtures.make_scanned_pdf, size["pages"],
+                       portrait=True)
+    borderless = fixture(f"scanned_borderless_{size['pages']}p.pdf", fixtures.make_scanned_pdf, size["pages"],
+                         bordered=False)
+
+    def run():
+        _extract_pages(bordered, "landscape", pages, False)
+        _extract_pages(borderless, "landscape", pages, True)
+        _extract_pages(portrait, "portrait", pages, False)
+    return run, 3 * size["ocr_pages"], "pages", has_poppler() and has_tesseract()
+
+def bench_image_ocr(size):
+    from tb_img2_v3 import PageTask, extraction_options, run_tasks
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, "scanned_table.png")
+    if not os.path.exists(path):
+        fixtures.table_image().save(path)
+    tasks = [PageTask(path, "image", None)] * size["ocr_pages"]
+
+    def run():
+        for _, _, error in run_tasks(tasks, extraction_options(False, False, False)):
+            if error is not None:
+                raise error
+    return run, size["ocr_pages"], "images", has_tesseract()
+
+def bench_table_regions(size):
+    from table_regions import REGION_DPI, find_table_regions
+    images = []
+    for page in range(size["pages"]):
+        for bordered in [True, False]:
+            image = fixtures.table_image(dpi=200, bordered=bordered, seed=page)
+            images.append((bordered, image.resize((image.width * REGION_DPI // 200, image.height * REGION_DPI // 200))))
+
+    def run():
+        # Doubles as a check: a scanned table, with or without a grid, must come out as a region
+        for bordered, image in images:
+            if not find_table_regions(image, REGION_DPI):
+                raise RuntimeError(f"No table region found on the {'bordered' if bordered else 'borderless'} scan")
+    return run, len(images), "pages", True
+
+def bench_write_both(size):
+    from tb_img2_v3 import PageTask, write_results
+    work_dir = tempfile.mkdtemp(prefix="bench_write_")
+    results = [(PageTask(os.path.join(work_dir, "report.pdf"), "landscape", page), [], None)
+               for page in range(1, size["pages"] + 1)]
+
+    # Check first: a page whose Parquet write fails must not be recorded as done in "both" mode
+    blocked = os.path.join(work_dir, "not_a_directory")
+    open(blocked, "w").close()
+    records = write_results(results[:1], work_dir, "both", dataset_dir=blocked)
+    if records[0]["status"] != "error":
+        raise RuntimeError("A failed dataset write was recorded as a success")
+
+    def run():
+        write_results(results, work_dir, "both", dataset_dir=os.path.join(work_dir, "dataset"))
+    return run, len(results), "pages", True
+
+def _harvest_csv(size):
+    return fixture(f"harvest_{size['csv_rows']}.csv", fixtures.make_harvest_csv, size["csv_rows"])
+
+def bench_csv_ingest(size):
+    from Aggregated_data_graph_generator_code import read_required_columns
+    path = _harvest_csv(size)
+    return lambda: read_required_columns(path), size["csv_rows"], "rows", True
+
+def bench_csv_aggregate(size):
+    from Aggregated_data_graph_generator_code import compute_aggregates, read_required_columns
+    df = read_required_columns(_harvest_csv(size))
+    return lambda: compute_aggregates(df), size["csv_rows"], "rows", True
+
+def _bench_charts(size, fast):
+    from Aggregated_data_graph_generator_code import create_visualizations, read_required_columns
+    df = read_required_columns(_harvest_csv(size))
+    output_path = os.path.join(tempfile.gettempdir(), f"bench_charts_{os.getpid()}.xlsx")
+
+    def run():
+        create_visualizations(df, output_path, fast=fast, png_charts=not fast)
+        os.remove(output_path)
+    # Excel sheets stop at 1,048,576 rows
+    return run, size["csv_rows"], "rows", size["csv_rows"] < 1_048_576
+
+def bench_charts_default(size):
+    return _bench_charts(size, fast=False)
+
+def bench_charts_fast(size):
+    return _bench_charts(size, fast=True)
+
+def _station_workbooks(size):
+    start, end = size["years"]
+    return [fixture(f"Station{i}_({start}-{end})_Temp_Prep.xlsx", fixtures.make_station_workbook, start, end, seed=i)
+            for i in range(size["stations"])]
+
+def bench_transpose_parse(size):
+    from Excel_transpose import parse_station_workbook, transpose_station
+    workbooks = _station_workbooks(size)
+
+    def run():
+        for path in workbooks:
+            transpose_station(parse_station_workbook(path))
+    return run, len(workbooks), "workbooks", True
+
+def bench_transpose_cached(size):
+    from Excel_transpose import cached_station_frame, transpose_station
+    workbooks = _station_workbooks(size)
+    cache_dir = os.path.join(FIXTURE_DIR, "climate_cache")
+    for path in workbooks:
+        cached_station_frame(path, cache_dir)
+
+    def run():
+        for path in workbooks:
+            transpose_station(cached_station_frame(path, cache_dir)[0])
+    return run, len(workbooks), "workbooks", True
+
+BENCHMARKS = {
+    "pdf.render": bench_pdf_render,
+    "pdf.orientation": bench_pdf_orientation,
+    "pdf.text_layer": bench_pdf_text_layer,
+    "pdf.ocr": bench_pdf_ocr,
+    "image.ocr": bench_image_ocr,
+    "image.regions": bench_table_regions,
+    "write.both": bench_write_both,
+    "csv.ingest": bench_csv_ingest,
+    "csv.aggregate": bench_csv_aggregate,
+    "charts.default": bench_charts_default,
+    "charts.fast": bench_charts_fast,
+    "transpose.parse": bench_transpose_parse,
+    "transpose.cached": bench_transpose_cached,
+}
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_history(records, path=HISTORY_PATH):
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+def baseline_throughput(history, stage, size, commit=None, runs=5):
+    """Median throughput of the previous runs of a stage/size (optionally only those of one commit)."""
+    previous = [r["throughput"] for r in history
+                if r["stage"] == stage and r["size"] == size and (commit is None or r["commit"] == commit)]
+    return statistics.median(previous[-runs:]) if previous else None
+
+def compare(records, history, threshold, commit=None):
+    """Prints each record against its baseline and returns the regressed ones."""
+    regressions = []
+    print(f"{'stage':<18} {'size':<7} {'seconds':>9} {'throughput':>16} {'baseline':>12} {'change':>8}")
+    for record in records:
+        baseline = baseline_throughput(history, record["stage"], record["size"], commit)
+        change = ""
+        flag = ""
+        if baseline:
+            ratio = record["throughput"] / baseline - 1
+            change = f"{ratio:+.1%}"
+            if ratio < -threshold:
+                regressions.append(record)
+                flag = " ⚠️ regression"
+        throughput = f"{record['throughput']:.1f} {record['unit']}/s"
+        baseline_text = f"{baseline:.1f}" if baseline else "-"
+        print(f"{record['stage']:<18} {record['size']:<7} {record['seconds']:>9.3f} {throughput:>16} "
+              f"{baseline_text:>12} {change:>8}{flag}")
+    return regressions
+
+def run_benchmark(stage, size_name, repeat):
+    """Times one stage at one size; returns a history record, or None when its tools are missing."""
+    size = SIZES[size_name]
+    run, units, unit, available = BENCHMARKS[stage](size)
+    if not available:
+        print(f"Skipping {stage} ({size_name}): required tool or size limit not met")
+        return None
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "stage": stage,
+            "size": size_name,
+            "units": units,
+            "unit": unit,
+            "seconds": round(seconds, 6),
+            "throughput": units / seconds if seconds > 0 else float("inf"),
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction, charting and climate pipelines.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--stages", nargs="+", default=None,
+                        help="Stages (or prefixes such as 'pdf' or 'csv') to run; default: all.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the fastest is kept.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative throughput drop that counts as a regression.")
+    parser.add_argument("--baseline-commit", default=None, help="Compare against this commit's results only.")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON lines file the results are appended to.")
+    parser.add_argument("--no-record", action="store_true", help="Do not append the results to the history.")
+    parser.add_argument("--report", action="store_true",
+                        help="Only print the latest recorded results against their baselines.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if args.report:
+        latest = {}
+        for index, record in enumerate(history):
+            latest[(record["stage"], record["size"])] = index
+        records = [history[i] for i in sorted(latest.values())]
+        regressions = compare(records, [r for i, r in enumerate(history) if i not in latest.values()],
+                              args.threshold, args.baseline_commit)
+    else:
+        stages = [s for s in BENCHMARKS
+                  if not args.stages or any(s == wanted or s.startswith(wanted + ".") for wanted in args.stages)]
+        records = []
+        for size_name in args.sizes:
+            for stage in stages:
+                record = run_benchmark(stage, size_name, args.repeat)
+                if record is not None:
+                    records.append(record)
+        regressions = compare(records, history, args.threshold, args.baseline_commit)
+        if not args.no_record:
+            append_history(records, args.history)
+            print(f"Results appended to {args.history}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
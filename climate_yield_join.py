@@ -0,0 +1,190 @@
+# Joins harvest records (Year of Harvest, City, Date Sown, Date of Cut (Last Cut)) to the daily weather of
+# their station and computes season-window climate features between sowing and last cut:
+# growing degree days, cumulative precipitation and mean temperature.
+#
+# The join is a vectorized interval lookup instead of a per-record loop: the weather of all stations is
+# sorted into one array keyed by (station, day), cumulative sums are taken once, and every record's window
+# is resolved with two binary searches (np.searchsorted), so each feature is a difference of two cumsums.
+#
+#   python climate_yield_join.py harvest.csv Lexington_(2001-2024)_Temp_Prep.xlsx ... --output features.parquet
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from Aggregated_data_graph_generator_code import read_required_columns
+from Excel_transpose import CACHE_DIR, cached_station_frame, expand_paths, numeric_measurements, station_name
+
+# Base temperature of alfalfa growth: 5 °C, i.e. 41 °F (station data is in °F unless told otherwise)
+GDD_BASE = 41.0
+# Keys are station_code * DAY_STRIDE + day number, so one sorted array holds every station
+DAY_STRIDE = 1 << 20
+
+def _find_column(columns, *keywords):
+    """First column whose lower-cased name contains every keyword, or None."""
+    for col in columns:
+        name = str(col).lower()
+        if all(keyword in name for keyword in keywords):
+            return col
+    return None
+
+def daily_weather(frame, station, tmax_col=None, tmin_col=None, tavg_col=None, precip_col=None,
+                  base_temp=GDD_BASE):
+    """
+    Normalises one station's numeric rows (Excel_transpose.numeric_measurements) to
+    station / Date / tmean / gdd / precip. Columns are found by name when not given.
+    """
+    columns = frame.columns
+    tmax_col = tmax_col or _find_column(columns, "max")
+    tmin_col = tmin_col or _find_column(columns, "min")
+    tavg_col = tavg_col or _find_column(columns, "avg") or _find_column(columns, "mean")
+    precip_col = precip_col or _find_column(columns, "precip") or _find_column(columns, "prcp") \
+        or _find_column(columns, "rain")
+
+    if tmax_col is not None and tmin_col is not None:
+        tmean = (frame[tmax_col].astype(float) + frame[tmin_col].astype(float)) / 2
+    elif tavg_col is not None:
+        tmean = frame[tavg_col].astype(float)
+    else:
+        raise ValueError(f"No temperature columns found for station {station}: {list(columns)}")
+
+    return pd.DataFrame({
+        "station": station,
+        "Date": pd.to_datetime(frame["Date"]).dt.normalize(),
+        "tmean": tmean.to_numpy(),
+        # Simple averaging method: degrees of the daily mean above the base, never negative
+        "gdd": np.clip(tmean.to_numpy() - base_temp, 0, None),
+        "precip": frame[precip_col].astype(float).to_numpy() if precip_col is not None else np.nan,
+    })
+
+def _day_numbers(dates):
+    return dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+class SeasonClimateIndex:
+    """
+    Cumulative weather sums of all stations in one sorted array, answering
+    "sum between day a and day b at station s" for many windows at once.
+    """
+
+    def __init__(self, weather):
+        weather = weather.dropna(subset=["Date"])
+        self.stations = pd.Index(sorted(weather["station"].unique()))
+        codes = self.stations.get_indexer(weather["station"])
+        keys = codes.astype(np.int64) * DAY_STRIDE + _day_numbers(weather["Date"])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+
+        def cumulative(values):
+            # Leading zero so that sum(lo:hi) == cum[hi] - cum[lo]
+            values = np.asarray(values, dtype=float)[order]
+            return np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))]), \
+                np.concatenate([[0], np.cumsum(~np.isnan(values))])
+
+        self.gdd, self.gdd_days = cumulative(weather["gdd"])
+        self.precip, self.precip_days = cumulative(weather["precip"])
+        self.tmean, self.tmean_days = cumulative(weather["tmean"])
+
+    def window_features(self, stations, start, end):
+        """
+        Features for every (station, start, end) window, start and end inclusive.
+        Windows with an unknown station or missing dates get NaN.
+        """
+        codes = self.stations.get_indexer(stations)
+        start_days = _day_numbers(pd.DatetimeIndex(start))
+        end_days = _day_numbers(pd.DatetimeIndex(end))
+        valid = (codes >= 0) & ~pd.isna(start).to_numpy() & ~pd.isna(end).to_numpy() & (end_days >= start_days)
+
+        base = np.where(valid, codes, 0).astype(np.int64) * DAY_STRIDE
+        lo = np.searchsorted(self.keys, base + np.where(valid, start_days, 0), side="left")
+        hi = np.searchsorted(self.keys, base + np.where(valid, end_days, 0), side="right")
+
+        def window(cum):
+            return np.where(valid, cum[hi] - cum[lo], np.nan)
+
+        tmean_days = window(self.tmean_days)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_temp = window(self.tmean) / tmean_days
+        return pd.DataFrame({
+            "season_days": np.where(valid, end_days - start_days + 1, np.nan),
+            "weather_days": tmean_days,
+            "gdd": np.where(window(self.gdd_days) > 0, window(self.gdd), np.nan),
+            "precip": np.where(window(self.precip_days) > 0, window(self.precip), np.nan),
+            "mean_temp": np.where(tmean_days > 0, mean_temp, np.nan),
+        })
+
+def _normalise_name(name):
+    return str(name).strip().lower()
+
+def join_climate(records, weather, station_map=None):
+    """
+    Adds station and season climate features to harvest records.
+
+    Args:
+    records (pandas.DataFrame): Harvest records with City, Date Sown and Date of Cut (Last Cut)
+    weather (pandas.DataFrame): Daily rows with station, Date, tmean, gdd, precip (see daily_weather)
+    station_map (dict): City -> station name; cities map to the station of the same name otherwise
+
+    Returns:
+    pandas.DataFrame: The records with station, season_days, weather_days, gdd, precip and mean_temp
+    """
+    index = SeasonClimateIndex(weather)
+    lookup = {_normalise_name(s): s for s in index.stations}
+    lookup.update({_normalise_name(city): station for city, station in (station_map or {}).items()})
+
+    cities = records["City"].astype(object)
+    # Map each distinct city once instead of every record
+    stations = cities.map({city: lookup.get(_normalise_name(city)) for city in pd.unique(cities.dropna())})
+
+    features = index.window_features(stations,
+                                     pd.to_datetime(records["Date Sown"], errors="coerce"),
+                                     pd.to_datetime(records["Date of Cut (Last Cut)"], errors="coerce"))
+    result = records.reset_index(drop=True).copy()
+    result["station"] = stations.reset_index(drop=True)
+    return pd.concat([result, features], axis=1)
+
+def load_weather(workbooks, cache_dir=CACHE_DIR, base_temp=GDD_BASE, **column_names):
+    """Daily weather of several station workbooks, read through the Excel_transpose Parquet cache."""
+    frames = []
+    for file_path in workbooks:
+        frame, _ = cached_station_frame(file_path, cache_dir)
+        frames.append(daily_weather(numeric_measurements(frame), station_name(file_path), base_temp=base_temp,
+                                    **column_names))
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Add season climate features to harvest records.")
+    parser.add_argument("csv_path", help="Harvest CSV (same columns as Aggregated_data_graph_generator_code).")
+    parser.add_argument("workbooks", nargs="+", help="Station workbooks, folders or glob patterns.")
+    parser.add_argument("--station-map", help="JSON file mapping city names to station names.")
+    parser.add_argument("--gdd-base", type=float, default=GDD_BASE, help="GDD base temperature (station units).")
+    parser.add_argument("--tmax-col", help="Daily maximum temperature column.")
+    parser.add_argument("--tmin-col", help="Daily minimum temperature column.")
+    parser.add_argument("--tavg-col", help="Daily mean temperature column (used without max/min).")
+    parser.add_argument("--precip-col", help="Daily precipitation column.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output", default="climate_yield_features.parquet",
+                        help="Joined table (.parquet or .csv).")
+    args = parser.parse_args()
+
+    station_map = None
+    if args.station_map:
+        with open(args.station_map) as f:
+            station_map = json.load(f)
+
+    weather = load_weather(expand_paths(args.workbooks), args.cache_dir, args.gdd_base,
+                           tmax_col=args.tmax_col, tmin_col=args.tmin_col,
+                           tavg_col=args.tavg_col, precip_col=args.precip_col)
+    joined = join_climate(read_required_columns(args.csv_path), weather, station_map)
+
+    if os.path.splitext(args.output)[1].lower() == ".csv":
+        joined.to_csv(args.output, index=False)
+    else:
+        joined.to_parquet(args.output, index=False)
+    matched = joined["station"].notna().sum()
+    print(f"✅ {len(joined)} records joined ({matched} matched to a station), saved as '{args.output}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# On-disk cache of extracted tables. Entries are keyed by the content hash of the source document together
+# with everything that changes the extraction result (page, rotation, img2table flags, OCR language and
+# backend, table region settings), so a re-run only pays for OCR and table detection on pages whose inputs
+# actually changed.
+
+import hashlib
+import json
+import os
+import pickle
+from importlib import metadata
+
+DEFAULT_CACHE_DIR = ".extraction_cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+# Hashes of already-seen files, keyed by (path, size, mtime) so big PDFs are hashed once per process.
+_file_hashes = {}
+
+def file_hash(file_path):
+    """Returns the SHA-256 of a file's content."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+def _library_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+class ExtractionCache:
+    """Stores extracted tables as pickles under `cache_dir`, evicting least recently used entries
+    once the cache grows beyond `max_bytes`."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, file_path, page, rotation, options, lang, **extra):
+        """Builds the cache key of one page extraction. `extra` holds any other setting that changes the result."""
+        parts = {"document": file_hash(file_path),
+                 "page": page,
+                 "rotation": rotation,
+                 "options": {k: options[k] for k in sorted(options)},
+                 "lang": lang,
+                 # Pickled tables are only valid for the img2table version that produced them
+                 "img2table": _library_version("img2table"),
+                 **extra}
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def get(self, key):
+        """Returns the cached tables for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                tables = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        # Touch the entry so eviction sees it as recently used; another process may have evicted it meanwhile
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return tables
+
+    def put(self, key, tables):
+        """Stores the tables of a key and trims the cache back under its size limit."""
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic rename so parallel workers never read a half-written entry
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        # Evicted by another worker since the listing
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                # Already evicted by another worker
+                total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
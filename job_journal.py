@@ -0,0 +1,131 @@
+# Durable journal of a batch extraction run. The outcome of every page task is appended to a JSON-lines
+# file (flushed and fsynced as soon as the page is written), so a run that crashes or is interrupted with
+# Ctrl-C can be started again with the same journal: pages recorded as done are skipped and only the
+# remaining and failed ones are extracted.
+#
+# Tasks are identified by the content hash of their document, the page, its orientation and rotation and
+# the run settings (flags, OCR language, output format and location), so a changed file or a run with
+# different settings never reuses an old entry.
+
+import hashlib
+import json
+import os
+import time
+
+from extraction_cache import file_hash
+
+DEFAULT_JOURNAL = "extraction_journal.jsonl"
+
+def task_key(task, settings):
+    """Identity of a page task within a journal."""
+    try:
+        document = file_hash(task.file_path)
+    except OSError:
+        # Missing files still get a stable key; their tasks fail and are journaled as errors
+        document = None
+    parts = {"document": document,
+             "file": os.path.abspath(task.file_path),
+             "kind": task.kind,
+             "page": task.page,
+             "rotation": task.rotation,
+             "options": task.options,
+             "settings": settings}
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class JobJournal:
+    """Append-only record of page task outcomes. The latest entry of a task decides its state."""
+
+    def __init__(self, path=DEFAULT_JOURNAL, settings=None):
+        self.path = path
+        self.settings = settings or {}
+        self.entries = {}
+        self.attempts = {}
+        self._keys = {}
+        self._needs_newline = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._needs_newline = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed in the middle of a write leaves one truncated line behind
+                    continue
+                self._apply(entry)
+
+    def _apply(self, entry):
+        key = entry["key"]
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        self.entries[key] = entry
+
+    def key(self, task):
+        # Keys are looked up many times per run; build each one once
+        memo_key = (task.file_path, task.kind, task.page, task.rotation, json.dumps(task.options, sort_keys=True))
+        if memo_key not in self._keys:
+            self._keys[memo_key] = task_key(task, self.settings)
+        return self._keys[memo_key]
+
+    def record(self, task, record):
+        """Durably appends the outcome (a task record of tb_img2_v3) of one page task."""
+        entry = {"key": self.key(task), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), **record}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._needs_newline:
+                f.write("\n")
+                self._needs_newline = False
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(entry)
+
+    def status(self, task):
+        """'success', 'error' or None for a task the journal has not seen."""
+        entry = self.entries.get(self.key(task))
+        return entry["status"] if entry is not None else None
+
+    def is_done(self, task):
+        return self.status(task) == "success"
+
+    def latest(self, task):
+        """The last recorded outcome of a task with its number of attempts, or None."""
+        key = self.key(task)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        record = {k: v for k, v in entry.items() if k not in ["key", "time"]}
+        record["attempts"] = self.attempts[key]
+        return record
+
+    def report(self, tasks):
+        """Final state of the tasks of a run: counts plus the last error of every failed task."""
+        report = {"journal": os.path.abspath(self.path),
+                  "tasks": len(tasks),
+                  "succeeded": 0,
+                  "failed": 0,
+                  "not_run": 0,
+                  "tables": 0,
+                  "failures": []}
+        for task in tasks:
+            record = self.latest(task)
+            if record is None:
+                report["not_run"] += 1
+            elif record["status"] == "success":
+                report["succeeded"] += 1
+                report["tables"] += record["tables"]
+            else:
+                report["failed"] += 1
+                report["failures"].append({"file": task.file_path, "kind": task.kind, "page": task.page,
+                                           "attempts": record["attempts"], "error": record["error"]})
+        return report
+
+    def write_report(self, tasks, report_path=None):
+        """Writes report() as JSON (next to the journal by default) and returns it."""
+        report = self.report(tasks)
+        report_path = report_path or os.path.splitext(self.path)[0] + "_report.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
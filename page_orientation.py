@@ -0,0 +1,113 @@
+# Automatic portrait/landscape classification of PDF pages, replacing the manual page prompts of tb_img2_v3.
+# Each page is rendered as a small grayscale thumbnail and classified either from text-line projection
+# profiles (fast, no extra dependency) or with Tesseract's orientation and script detection (OSD).
+
+from collections import namedtuple
+
+import numpy as np
+from pdf2image import convert_from_path
+
+# Thumbnails only need to show where the text lines are, not what they say.
+THUMBNAIL_DPI = 40
+# OSD has to recognise a few characters, so it gets a slightly larger (still well below 200 DPI) render.
+OSD_DPI = 100
+# Number of thumbnails rendered per pdftoppm call.
+THUMBNAIL_BATCH = 16
+# Pages classified with a lower confidence than this are worth a look before extracting.
+LOW_CONFIDENCE = 0.15
+
+# orientation is "landscape" (text is upright, extracted as is) or "portrait" (page must be rotated);
+# rotation is the angle passed to PIL's rotate() to make the text upright.
+PageOrientation = namedtuple("PageOrientation", ["page", "orientation", "rotation", "confidence", "method"])
+
+def iter_thumbnails(file_path, pages, dpi=THUMBNAIL_DPI, batch=THUMBNAIL_BATCH):
+    """Yields (page, grayscale thumbnail) for the given 1-based pages, rendering consecutive pages together."""
+    pages = sorted(set(pages))
+    start = 0
+    while start < len(pages):
+        # Grow the batch while the pages are consecutive so a single pdftoppm call renders them all
+        end = start
+        while end + 1 < len(pages) and pages[end + 1] == pages[end] + 1 and end + 1 - start < batch:
+            end += 1
+        images = convert_from_path(file_path, dpi=dpi, first_page=pages[start], last_page=pages[end],
+                                   grayscale=True)
+        for page, image in zip(pages[start:end + 1], images):
+            yield page, image
+        start = end + 1
+
+def _otsu_threshold(gray):
+    """Gray level that best separates ink from paper."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(float)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+def _profile_score(profile):
+    """How sharply a projection profile alternates between ink and gaps, as text lines do across their direction."""
+    profile = profile.astype(float)
+    mean = profile.mean()
+    if mean == 0:
+        return 0.0
+    return float(np.abs(np.diff(profile)).mean() / mean)
+
+def orientation_from_profiles(image):
+    """Classifies a thumbnail from its row and column ink profiles. Returns (orientation, rotation, confidence)."""
+    gray = np.asarray(image.convert("L"))
+    ink = gray < _otsu_threshold(gray)
+    if not ink.any():
+        return "landscape", 0, 0.0
+
+    # Horizontal text gives rows that alternate between lines and spacing; vertical text does the same with columns
+    row_score = _profile_score(ink.sum(axis=1))
+    column_score = _profile_score(ink.sum(axis=0))
+    confidence = abs(row_score - column_score) / max(row_score + column_score, 1e-9)
+    if row_score >= column_score:
+        return "landscape", 0, confidence
+    # The projection cannot tell clockwise from counter-clockwise text; use the rotation of the manual workflow
+    return "portrait", -90, confidence
+
+def orientation_from_osd(image):
+    """Classifies a thumbnail with Tesseract OSD. Returns (orientation, rotation, confidence)."""
+    import pytesseract
+
+    osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+    # OSD reports the clockwise rotation that makes the text upright; PIL rotates counter-clockwise
+    clockwise = int(osd["rotate"]) % 360
+    confidence = min(float(osd["orientation_conf"]) / 10.0, 1.0)
+    if clockwise == 0:
+        return "landscape", 0, confidence
+    return "portrait", -clockwise, confidence
+
+def detect_orientations(file_path, pages, method="profile", dpi=None):
+    """Returns a PageOrientation for each page. With method="osd", pages OSD cannot read fall back to profiles."""
+    if dpi is None:
+        dpi = OSD_DPI if method == "osd" else THUMBNAIL_DPI
+    results = []
+    for page, thumbnail in iter_thumbnails(file_path, pages, dpi=dpi):
+        used = method
+        if method == "osd":
+            try:
+                orientation, rotation, confidence = orientation_from_osd(thumbnail)
+            except Exception:
+                used = "profile"
+                orientation, rotation, confidence = orientation_from_profiles(thumbnail)
+        else:
+            orientation, rotation, confidence = orientation_from_profiles(thumbnail)
+        results.append(PageOrientation(page, orientation, rotation, round(confidence, 3), used))
+    return results
+
+def apply_overrides(orientations, portrait_pages=(), landscape_pages=()):
+    """Forces the given pages to portrait or landscape, keeping the detected rotation where it fits."""
+    overridden = []
+    for result in orientations:
+        if result.page in portrait_pages and result.orientation != "portrait":
+            result = result._replace(orientation="portrait", rotation=-90, confidence=1.0, method="override")
+        elif result.page in landscape_pages and result.orientation != "landscape":
+            result = result._replace(orientation="landscape", rotation=0, confidence=1.0, method="override")
+        overridden.append(result)
+    return overridden
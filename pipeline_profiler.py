@@ -0,0 +1,183 @@
+# Per-stage timing and resource instrumentation for the extraction pipeline.
+#
+# Every instrumented stage (rendering, rotation, in-memory encoding, text-layer reading, OCR, table detection,
+# cache lookups, Excel/Parquet writing, and the whole page task around them) appends one JSON line with its
+# wall time, CPU time (including finished child processes such as the tesseract CLI), own time excluding
+# nested stages, and the process's peak RSS so far (process_peak_rss_mb: a high-water mark of the whole
+# process, not the stage's own peak). Pool workers inherit the log path through the environment and append
+# to the same file.
+#
+#   python tb_img2_v3.py --profile-log profile.jsonl      -> record, then print a summary
+#   python pipeline_profiler.py profile.jsonl [--by file]  -> summary of an existing log
+#
+# With --cprofile the page tasks also run under cProfile; each process dumps its cumulative stats to
+# <path>.<pid>, readable with pstats or snakeviz. For sampling, py-spy can attach from outside
+# (py-spy record --subprocesses -- python tb_img2_v3.py ...) and shows the same stage functions.
+
+import argparse
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOG_ENV = "TB_IMG2_PROFILE_LOG"
+CPROFILE_ENV = "TB_IMG2_CPROFILE"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_profiler = None
+
+def configure(log_path=None, cprofile_path=None):
+    """Turns instrumentation on for this process and, through the environment, for worker processes."""
+    for env, value in [(LOG_ENV, log_path), (CPROFILE_ENV, cprofile_path)]:
+        if value:
+            os.environ[env] = os.path.abspath(value)
+        else:
+            os.environ.pop(env, None)
+
+def enabled():
+    return LOG_ENV in os.environ
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where the platform cannot tell)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def children_cpu_s():
+    """User + system CPU time of the finished child processes of this process (e.g. tesseract runs)."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def _emit(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        # One write per line in append mode keeps lines from different processes whole
+        with open(os.environ[LOG_ENV], "a", encoding="utf-8") as f:
+            f.write(line)
+
+@contextmanager
+def stage(name, **tags):
+    """Times the enclosed block as stage `name`. Tags such as file and page are copied into the record
+    and inherited by the stages nested inside it."""
+    if not enabled():
+        yield
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    if stack:
+        tags = {**stack[-1]["tags"], **tags}
+    frame = {"children": 0.0, "tags": tags}
+    stack.append(frame)
+    wall_start, cpu_start = time.perf_counter(), time.process_time() + children_cpu_s()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() + children_cpu_s() - cpu_start
+        stack.pop()
+        if stack:
+            stack[-1]["children"] += wall
+        _emit({"stage": name,
+               **tags,
+               "wall_s": round(wall, 6),
+               "self_s": round(wall - frame["children"], 6),
+               "cpu_s": round(cpu, 6),
+               "process_peak_rss_mb": peak_rss_mb(),
+               "depth": len(stack),
+               "pid": os.getpid(),
+               "time": time.time(),
+               "error": type(error).__name__ if error is not None else None})
+
+def timed_method(obj, method_name, stage_name, **tags):
+    """Wraps a bound method of `obj` (e.g. the OCR engine) so that every call is recorded as a stage."""
+    method = getattr(obj, method_name)
+    if getattr(method, "_profiled", False):
+        return
+
+    def wrapper(*args, **kwargs):
+        with stage(stage_name, **tags):
+            return method(*args, **kwargs)
+    wrapper._profiled = True
+    setattr(obj, method_name, wrapper)
+
+@contextmanager
+def cprofiled():
+    """Runs the enclosed hot-path block under this process's cProfile profiler when --cprofile is on."""
+    global _profiler
+    path = os.environ.get(CPROFILE_ENV)
+    if not path:
+        yield
+        return
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+    _profiler.enable()
+    try:
+        yield
+    finally:
+        _profiler.disable()
+        # Pool workers exit without running atexit hooks, so dump after every block
+        _profiler.dump_stats(f"{path}.{os.getpid()}")
+
+def load(log_path):
+    with open(log_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(records, by=None):
+    """Aggregates records per stage (and per `by` tag, e.g. 'file' or 'page') into summary rows."""
+    groups = defaultdict(lambda: {"calls": 0, "wall_s": 0.0, "self_s": 0.0, "cpu_s": 0.0,
+                                  "process_peak_rss_mb": 0.0, "errors": 0})
+    for record in records:
+        key = (record["stage"],) if by is None else (record.get(by), record["stage"])
+        group = groups[key]
+        group["calls"] += 1
+        group["wall_s"] += record["wall_s"]
+        group["self_s"] += record["self_s"]
+        group["cpu_s"] += record["cpu_s"]
+        # Logs written before the field was renamed call it peak_rss_mb
+        peak = record.get("process_peak_rss_mb", record.get("peak_rss_mb"))
+        group["process_peak_rss_mb"] = max(group["process_peak_rss_mb"], peak or 0.0)
+        group["errors"] += record.get("error") is not None
+    return sorted(([*key, values] for key, values in groups.items()), key=lambda row: -row[-1]["self_s"])
+
+def print_summary(records, by=None):
+    """Prints where the time went, biggest own time first."""
+    rows = summarize(records, by)
+    total_self = sum(row[-1]["self_s"] for row in rows) or 1.0
+    label = "stage" if by is None else f"{by} / stage"
+    print(f"{label:<48} {'calls':>6} {'wall s':>10} {'self s':>10} {'self %':>7} {'cpu s':>10} {'proc peak MB':>12}")
+    for row in rows:
+        values = row[-1]
+        name = " / ".join(str(part) for part in row[:-1])
+        print(f"{name[-48:]:<48} {values['calls']:>6} {values['wall_s']:>10.3f} {values['self_s']:>10.3f} "
+              f"{values['self_s'] / total_self:>7.1%} {values['cpu_s']:>10.3f} {values['process_peak_rss_mb']:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a pipeline profile log.")
+    parser.add_argument("log_path", help="JSON lines written with --profile-log.")
+    parser.add_argument("--by", choices=["file", "page", "kind", "pid"], default=None,
+                        help="Also break the summary down by this tag.")
+    args = parser.parse_args()
+    print_summary(load(args.log_path), args.by)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Consolidated columnar output for the extraction scripts. Instead of one workbook per page, every
+# extracted table is streamed into a single Parquet dataset in long format (one row per cell), tagged with
+# its source file (absolute path), page, orientation and table index, and partitioned by source document
+# (hive style: <dataset>/source=<file name>-<path hash>/...). The whole multi-state dataset then loads with
+# one columnar scan.
+#
+#   python table_dataset.py export extracted_tables combined_tables   -> optional Excel export afterwards
+
+import argparse
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_DATASET_DIR = "extracted_tables"
+
+SCHEMA = pa.schema([("source_file", pa.string()),
+                    ("page", pa.int32()),
+                    ("orientation", pa.string()),
+                    ("table_index", pa.int32()),
+                    ("row", pa.int32()),
+                    ("column", pa.int32()),
+                    ("value", pa.string())])
+
+def source_name(file_path):
+    """Partition value of a source document: its file name and a short hash of its absolute path, so
+    reports with the same name in different folders keep separate partitions."""
+    path = os.path.abspath(file_path)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest}"
+
+def partition_dir(dataset_dir, file_path):
+    return os.path.join(dataset_dir, f"source={source_name(file_path)}")
+
+def _cell_values(df):
+    values = df.to_numpy(dtype=object).ravel()
+    return [None if v is None or (isinstance(v, float) and np.isnan(v)) else str(v) for v in values]
+
+def tables_to_arrow(file_path, page, orientation, tables):
+    """Turns the tables of one page into a long-format Arrow table (one row per cell)."""
+    columns = {name: [] for name in SCHEMA.names}
+    file_path = os.path.abspath(file_path)
+    for table_index, table in enumerate(tables):
+        df = table.df
+        n_rows, n_cols = df.shape
+        if n_rows == 0 or n_cols == 0:
+            continue
+        size = n_rows * n_cols
+        columns["source_file"].append(np.full(size, file_path, dtype=object))
+        columns["page"].append(np.full(size, page or 1, dtype=np.int32))
+        columns["orientation"].append(np.full(size, orientation, dtype=object))
+        columns["table_index"].append(np.full(size, table_index, dtype=np.int32))
+        columns["row"].append(np.repeat(np.arange(n_rows, dtype=np.int32), n_cols))
+        columns["column"].append(np.tile(np.arange(n_cols, dtype=np.int32), n_rows))
+        columns["value"].append(np.array(_cell_values(df), dtype=object))
+
+    if not columns["value"]:
+        return SCHEMA.empty_table()
+    arrays = [pa.array(np.concatenate(columns[field.name]), type=field.type) for field in SCHEMA]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+def clear_source(dataset_dir, file_path):
+    """Removes the partition of a source document so it can be rewritten from scratch."""
+    shutil.rmtree(partition_dir(dataset_dir, file_path), ignore_errors=True)
+
+def write_page_tables(dataset_dir, file_path, page, orientation, tables):
+    """Writes the tables of one page as a Parquet fragment of the dataset and returns the fragment path.
+    Fragment names are deterministic, so re-running a page replaces its previous output."""
+    directory = partition_dir(dataset_dir, file_path)
+    os.makedirs(directory, exist_ok=True)
+    fragment = os.path.join(directory, f"{orientation}_page_{page or 1}.parquet")
+    pq.write_table(tables_to_arrow(file_path, page, orientation, tables), fragment)
+    return fragment
+
+def open_dataset(dataset_dir):
+    """Opens the whole dataset (all sources) as a pyarrow dataset."""
+    partitioning = ds.partitioning(pa.schema([("source", pa.string())]), flavor="hive")
+    return ds.dataset(dataset_dir, format="parquet", schema=SCHEMA.append(pa.field("source", pa.string())),
+                      partitioning=partitioning)
+
+def load_tables(dataset_dir, sources=None):
+    """Loads the dataset (optionally only some source documents) into a long-format DataFrame."""
+    dataset = open_dataset(dataset_dir)
+    filter_expr = ds.field("source").isin(sources) if sources else None
+    return dataset.to_table(filter=filter_expr).to_pandas()
+
+def iter_tables(long_df):
+    """Yields ((source_file, page, orientation, table_index), wide DataFrame) for every table."""
+    keys = ["source_file", "page", "orientation", "table_index"]
+    for key, cells in long_df.groupby(keys, sort=True):
+        wide = cells.pivot(index="row", columns="column", values="value")
+        wide.index.name, wide.columns.name = None, None
+        yield key, wide
+
+def export_xlsx(dataset_dir, output_dir=""):
+    """Optional final step: writes one workbook per source document, one sheet per table."""
+    long_df = load_tables(dataset_dir)
+    written = []
+    for source_file, source_df in long_df.groupby("source_file"):
+        output_path = os.path.join(output_dir, source_name(source_file) + "_tables.xlsx")
+        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
+            for (_, page, _, table_index), table in iter_tables(source_df):
+                table.to_excel(writer, sheet_name=f"Page {page} - Table {table_index + 1}", index=False, header=False)
+        written.append(output_path)
+        print(f"✅ Success: Excel file created at {output_path}")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Work with the consolidated table dataset.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export every table of the dataset to Excel.")
+    export.add_argument("dataset_dir", nargs="?", default=DEFAULT_DATASET_DIR)
+    export.add_argument("output_dir", nargs="?", default="")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        export_xlsx(args.dataset_dir, args.output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+# Post-extraction normalization of the consolidated table dataset (see table_dataset):
+#
+# 1. Numeric and unit cleanup, vectorized over every cell at once: OCR confusions inside numbers (O/0, l/1),
+#    thousands separators, significance letters and footnote marks are removed, and yield units given in a
+#    header or a cell are converted to tons/acre.
+# 2. Cross-page stitching: a table that continues on the next page of the same report, with the same number
+#    of columns and either the same (repeated) header or no header and the same numeric columns, is appended
+#    to the table before it.
+# 3. Canonical variety and location names, matched against reference lists with a trigram-indexed fuzzy
+#    matcher: each distinct name is only scored (RapidFuzz) against the few reference names that share
+#    character trigrams with it, never against the whole list.
+#
+# The result is one long-format table (one row per body cell) with the stitched table id, a cleaned column
+# name, the parsed number, its unit and the canonical name.
+#
+#   python table_normalize.py extracted_tables normalized_tables.parquet --varieties varieties.txt --locations cities.txt
+#
+# Reference lists have one name per line, optionally followed by known spellings: "Vernal; Vernall; Vemal".
+
+import argparse
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from table_dataset import DEFAULT_DATASET_DIR, load_tables
+
+TABLE_KEYS = ["source_file", "page", "table_index"]
+# Header rows are the leading rows without any measurement (years and column numbers are labels), up to this many
+MAX_HEADER_ROWS = 3
+# Bare integers in this range are read as years when they head a column
+YEARS = (1900, 2100)
+# A column is numeric when at least this share of its non-empty body cells parse as numbers
+NUMERIC_SHARE = 0.8
+# Cells that mean "no value"
+EMPTY_VALUES = ["", "-", "--", "---", "—", "–", ".", "na", "n/a", "nd", "ns", "*"]
+NUMBER_PATTERN = r"^([-+]?(?:\d[\d,]*(?:\.\d*)?|\.\d+))\s*([a-z%/\.]*)\s*\**$"
+# Yield units seen in state reports, converted to tons/acre
+UNIT_FACTORS = {"tons/acre": ("tons/acre", 1.0),
+                "ton/acre": ("tons/acre", 1.0),
+                "tons/a": ("tons/acre", 1.0),
+                "t/a": ("tons/acre", 1.0),
+                "lb/acre": ("tons/acre", 1 / 2000),
+                "lbs/acre": ("tons/acre", 1 / 2000),
+                "lb/a": ("tons/acre", 1 / 2000),
+                "t/ha": ("tons/acre", 0.4461),
+                "mg/ha": ("tons/acre", 0.4461),
+                "kg/ha": ("tons/acre", 0.4461 / 1000),
+                "%": ("%", 1.0)}
+VARIETY_HEADERS = ["variety", "cultivar", "entry", "brand"]
+LOCATION_HEADERS = ["location", "city", "site", "county"]
+# Reference names scored per query, picked by the number of shared trigrams
+CANDIDATES = 10
+SCORE_CUTOFF = 85
+
+def normalize_name(value):
+    """Lower-cased name with punctuation removed and whitespace collapsed, used for matching."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(value).lower()).split())
+
+def parse_numbers(values):
+    """
+    Parses a Series of raw cell strings in one vectorized pass.
+
+    Returns:
+    pandas.DataFrame: number (float, NaN when the cell is not a number), unit (suffix such as "%" or
+    "lb/a", "" when none) and empty (True for blank and placeholder cells)
+    """
+    text = values.fillna("").astype(str).str.strip().str.lower()
+    empty = text.isin(EMPTY_VALUES)
+    # OCR confusions, fixed only in cells that are otherwise a number so units such as "lbs" keep their letters
+    confused = text.str.fullmatch(r"\(?[-+]?[\d,.oli|]*\d[\d,.oli|]*\)?\**")
+    fixed = text.str.replace("o", "0", regex=False).str.replace(r"[li|]", "1", regex=True)
+    text = text.where(~confused, fixed)
+    negative = text.str.match(r"^\(.*\)$")
+    text = text.str.replace(r"^\((.*)\)$", r"\1", regex=True)
+
+    parts = text.str.extract(NUMBER_PATTERN)
+    number = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    number = number.where(~negative, -number)
+    return pd.DataFrame({"number": number, "unit": parts[1].fillna(""), "empty": empty}, index=values.index)
+
+def header_unit(header):
+    """Unit written in a column header, e.g. 'Yield (tons/acre)' -> 'tons/acre'."""
+    match = re.search(r"\(([^)]*)\)", header)
+    if match:
+        unit = match.group(1).strip().lower().replace(" ", "")
+        if unit in UNIT_FACTORS:
+            return unit
+    return ""
+
+def _column_names(headers):
+    """Column names from header texts, with blanks filled in and duplicates numbered."""
+    names, seen = [], Counter()
+    for index, header in enumerate(headers):
+        name = " ".join(str(header).split()) or f"column_{index + 1}"
+        seen[name] += 1
+        names.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return names
+
+def table_layout(cells):
+    """
+    Per-table header information of a long-format cell frame (with the columns of parse_numbers).
+
+    Returns:
+    pandas.DataFrame: One row per table (indexed by TABLE_KEYS) with n_rows, n_columns, header_rows,
+    headers (list of header texts per column), header_key (normalized headers, for matching) and
+    numeric_profile (per column, whether its body is numeric)
+    """
+    grouped = cells.groupby(TABLE_KEYS)
+    layout = pd.DataFrame({"n_rows": grouped["row"].max() + 1, "n_columns": grouped["column"].max() + 1})
+    column_keys = [cells[key] for key in TABLE_KEYS + ["column"]]
+
+    # Years ("Variety | 2019 | 2020") and bare integers over a column of decimals ("Entry | 1 | 2") label the
+    # columns; only the other numbers mark the first body row
+    has_number = cells["number"].notna()
+    bare = has_number & cells["value"].fillna("").astype(str).str.strip().str.fullmatch(r"\d{1,4}")
+    year = bare & cells["number"].between(*YEARS)
+    decimal_column = (has_number & ~bare).groupby(column_keys).transform("any")
+    measurement = has_number & ~(year | (bare & decimal_column))
+    first_numeric = cells.loc[measurement].groupby(TABLE_KEYS)["row"].min()
+    # Tables without any number (e.g. variety descriptions) keep a single header row
+    header_rows = first_numeric.reindex(layout.index).fillna(1).clip(upper=MAX_HEADER_ROWS)
+    layout["header_rows"] = np.minimum(header_rows.astype(int), layout["n_rows"])
+
+    in_header = cells["row"] < layout["header_rows"].reindex(pd.MultiIndex.from_frame(cells[TABLE_KEYS])).to_numpy()
+    header_cells = cells.loc[in_header].sort_values(TABLE_KEYS + ["column", "row"])
+    texts = header_cells.assign(value=header_cells["value"].fillna("")) \
+        .groupby(TABLE_KEYS + ["column"])["value"].agg(lambda parts: " ".join(p for p in parts if p)).to_dict()
+
+    body = ~in_header & ~cells["empty"]
+    share = (has_number & body).groupby(column_keys).sum() / body.groupby(column_keys).sum().replace(0, np.nan)
+    numeric = (share >= NUMERIC_SHARE).to_dict()
+
+    headers, keys, profiles = [], [], []
+    for table, n_columns in layout["n_columns"].items():
+        row = [texts.get((*table, column), "") for column in range(n_columns)]
+        headers.append(row)
+        keys.append(tuple(normalize_name(header) for header in row))
+        profiles.append(tuple(bool(numeric.get((*table, column), False)) for column in range(n_columns)))
+    layout["headers"] = headers
+    layout["header_key"] = keys
+    layout["numeric_profile"] = profiles
+    return layout
+
+def stitch_tables(layout):
+    """
+    Assigns every table to a stitched table. A table continues the previous one when it comes from the
+    same report, sits on the next page, has as many columns, and either repeats its header or has none and
+    the same numeric columns (with at least one of them).
+
+    Returns:
+    pandas.DataFrame: The layout with table_id (stitched table) and row_offset (position of the table's
+    first body row within the stitched table)
+    """
+    table_ids, offsets = [], []
+    table_id, offset = -1, 0
+    previous = None
+    for (source_file, page, _), table in layout.sort_index().iterrows():
+        continues = (previous is not None
+                     and source_file == previous["source_file"]
+                     and page == previous["page"] + 1
+                     and table["n_columns"] == previous["n_columns"]
+                     and ((table["header_rows"] > 0 and table["header_key"] == previous["header_key"])
+                          or (table["header_rows"] == 0
+                              and any(table["numeric_profile"])
+                              and table["numeric_profile"] == previous["numeric_profile"])))
+        if not continues:
+            table_id += 1
+            offset = 0
+            previous = {"source_file": source_file, "n_columns": table["n_columns"],
+                        "header_key": table["header_key"], "numeric_profile": table["numeric_profile"]}
+        previous["page"] = page
+        table_ids.append(table_id)
+        offsets.append(offset)
+        offset += table["n_rows"] - table["header_rows"]
+
+    stitched = layout.sort_index()
+    stitched["table_id"] = table_ids
+    stitched["row_offset"] = offsets
+    return stitched
+
+class NameIndex:
+    """
+    Reference names indexed by character trigrams. A query is looked up exactly first, then scored only
+    against the CANDIDATES reference names that share the most trigrams with it.
+    """
+
+    def __init__(self, names):
+        self.canonical = []
+        self.keys = []
+        self.exact = {}
+        self.postings = defaultdict(list)
+        for canonical, aliases in names:
+            for name in [canonical] + list(aliases):
+                key = normalize_name(name)
+                if not key or key in self.exact:
+                    continue
+                entry = len(self.keys)
+                self.keys.append(key)
+                self.canonical.append(canonical)
+                self.exact[key] = canonical
+                for gram in self._trigrams(key):
+                    self.postings[gram].append(entry)
+
+    @staticmethod
+    def _trigrams(key):
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @classmethod
+    def from_file(cls, path):
+        """Reads a reference list: one name per line, optionally followed by '; alias; alias'."""
+        names = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = [part.strip() for part in line.split(";") if part.strip()]
+                if parts and not parts[0].startswith("#"):
+                    names.append((parts[0], parts[1:]))
+        return cls(names)
+
+    def match(self, value, score_cutoff=SCORE_CUTOFF):
+        """Returns (canonical name, score) for a raw name, or (None, best score) below the cutoff."""
+        key = normalize_name(value)
+        if not key:
+            return None, 0.0
+        if key in self.exact:
+            return self.exact[key], 100.0
+
+        shared = Counter(entry for gram in self._trigrams(key) for entry in self.postings.get(gram, ()))
+        candidates = [entry for entry, _ in shared.most_common(CANDIDATES)]
+        if not candidates:
+            return None, 0.0
+        best = process.extractOne(key, [self.keys[entry] for entry in candidates], scorer=fuzz.WRatio)
+        _, score, position = best
+        if score < score_cutoff:
+            return None, score
+        return self.canonical[candidates[position]], score
+
+    def canonicalize(self, values, score_cutoff=SCORE_CUTOFF):
+        """Canonical names and scores for a Series; every distinct value is matched once."""
+        matches = {value: self.match(value, score_cutoff) for value in pd.unique(values.dropna())}
+        canonical = values.map({value: match[0] for value, match in matches.items()})
+        score = values.map({value: match[1] for value, match in matches.items()}).astype(float)
+        return canonical, score
+
+def _header_kind(header):
+    name = normalize_name(header)
+    if any(word in name for word in VARIETY_HEADERS):
+        return "variety"
+    if any(word in name for word in LOCATION_HEADERS):
+        return "location"
+    return None
+
+def normalize_tables(long_df, varieties=None, locations=None, score_cutoff=SCORE_CUTOFF):
+    """
+    Cleans, stitches and canonicalizes the extracted tables of a long-format DataFrame (see table_dataset).
+
+    Args:
+    long_df (pandas.DataFrame): Cells with source_file, page, table_index, row, column and value
+    varieties (NameIndex): Reference variety names, or None to leave variety columns as they are
+    locations (NameIndex): Reference location names, or None to leave location columns as they are
+    score_cutoff (float): Lowest RapidFuzz WRatio score accepted as a match
+
+    Returns:
+    pandas.DataFrame: One row per body cell with source_file, table_id, pages, row, column, column_name,
+    value, number, unit, canonical and match_score
+    """
+    output_columns = ["source_file", "table_id", "pages", "row", "column", "column_name", "value", "number", "unit",
+                      "canonical", "match_score"]
+    if long_df.empty:
+        return pd.DataFrame(columns=output_columns)
+
+    cells = long_df[TABLE_KEYS + ["row", "column", "value"]].reset_index(drop=True)
+    cells = pd.concat([cells, parse_numbers(cells["value"])], axis=1)
+
+    layout = stitch_tables(table_layout(cells))
+    # Page range of every stitched table, for tracing values back to the report
+    pages = layout.reset_index().groupby("table_id")["page"].agg(lambda p: f"{p.min()}-{p.max()}" if p.nunique() > 1
+                                                                  else str(p.min()))
+
+    # Drop header rows and number the body rows of each stitched table consecutively
+    per_cell = layout[["table_id", "row_offset", "header_rows"]].reindex(pd.MultiIndex.from_frame(cells[TABLE_KEYS]))
+    body = cells["row"].to_numpy() >= per_cell["header_rows"].to_numpy()
+    cells["table_id"] = per_cell["table_id"].to_numpy()
+    cells["row"] = cells["row"].to_numpy() - per_cell["header_rows"].to_numpy() + per_cell["row_offset"].to_numpy()
+    cells = cells.loc[body].reset_index(drop=True)
+
+    # Column names, units and name kinds come from the first table of each stitched table
+    first = layout.groupby("table_id").head(1).set_index("table_id")
+    columns = pd.DataFrame([(table_id, column, name, header_unit(name), _header_kind(name))
+                            for table_id, headers in first["headers"].items()
+                            for column, name in enumerate(_column_names(headers))],
+                           columns=["table_id", "column", "column_name", "header_unit", "kind"])
+    cells = cells.merge(columns, on=["table_id", "column"], how="left")
+
+    # Numbers only count in columns that are mostly numbers; elsewhere they are names, codes or notes
+    filled = ~cells["empty"]
+    share = (cells["number"].notna() & filled).groupby([cells["table_id"], cells["column"]]).sum() \
+        / filled.groupby([cells["table_id"], cells["column"]]).sum().replace(0, np.nan)
+    numeric = (share >= NUMERIC_SHARE).reindex(pd.MultiIndex.from_frame(cells[["table_id", "column"]])).to_numpy()
+    cells["number"] = cells["number"].where(numeric)
+
+    unit = cells["unit"].where(cells["unit"].isin(list(UNIT_FACTORS)), "")
+    unit = unit.where(unit != "", cells["header_unit"].fillna(""))
+    factors = unit.map({name: factor for name, (_, factor) in UNIT_FACTORS.items()}).fillna(1.0)
+    cells["number"] = cells["number"] * factors
+    cells["unit"] = unit.map({name: canonical for name, (canonical, _) in UNIT_FACTORS.items()}).where(numeric)
+
+    cells["canonical"] = None
+    cells["match_score"] = np.nan
+    for kind, index in [("variety", varieties), ("location", locations)]:
+        selected = cells["kind"] == kind
+        if index is None or not selected.any():
+            continue
+        canonical, score = index.canonicalize(cells.loc[selected, "value"], score_cutoff)
+        cells.loc[selected, "canonical"] = canonical
+        cells.loc[selected, "match_score"] = score
+
+    cells["pages"] = cells["table_id"].map(pages)
+    return cells[output_columns].sort_values(["table_id", "row", "column"], kind="stable").reset_index(drop=True)
+
+def wide_table(normalized, table_id, use_canonical=True):
+    """One stitched table as a regular DataFrame: numbers where a column is numeric, canonical names
+    (when matched) or the cleaned text elsewhere."""
+    cells = normalized[normalized["table_id"] == table_id]
+    values = cells["number"].astype(object).where(cells["number"].notna(), cells["value"])
+    if use_canonical:
+        values = cells["canonical"].where(cells["canonical"].notna(), values)
+    wide = cells.assign(cell=values).pivot(index="row", columns="column_name", values="cell")
+    ordered = cells.drop_duplicates("column").sort_values("column")["column_name"]
+    wide = wide[ordered]
+    wide.index.name, wide.columns.name = None, None
+    return wide
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean, stitch and canonicalize the extracted table dataset.")
+    parser.add_argument("dataset_dir", nargs="?", default=DEFAULT_DATASET_DIR)
+    parser.add_argument("output", nargs="?", default="normalized_tables.parquet",
+                        help="Normalized long-format table (.parquet or .csv).")
+    parser.add_argument("--varieties", help="Reference list of variety names.")
+    parser.add_argument("--locations", help="Reference list of location names.")
+    parser.add_argument("--score-cutoff", type=float, default=SCORE_CUTOFF,
+                        help="Lowest fuzzy match score (0-100) accepted for a canonical name.")
+    args = parser.parse_args()
+
+    varieties = NameIndex.from_file(args.varieties) if args.varieties else None
+    locations = NameIndex.from_file(args.locations) if args.locations else None
+    normalized = normalize_tables(load_tables(args.dataset_dir), varieties, locations, args.score_cutoff)
+
+    if args.output.lower().endswith(".csv"):
+        normalized.to_csv(args.output, index=False)
+    else:
+        normalized.to_parquet(args.output, index=False)
+    tables = normalized["table_id"].nunique()
+    matched = normalized["canonical"].notna().sum()
+    print(f"✅ {len(normalized)} cells in {tables} stitched tables ({matched} names canonicalized), "
+          f"saved as '{args.output}'")
+
+if __name__ == "__main__":
+    main()
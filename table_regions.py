@@ -0,0 +1,140 @@
+# Adaptive resolution for scanned pages. Table regions are located on a cheap low-DPI render, every region
+# is rendered again at the resolution its text size needs for Tesseract, and only those crops are handed to
+# img2table, so margins, headings and prose no longer cost OCR time.
+#
+# A region is a block of text lines (separated from the next block by a blank band) that either has column
+# gaps shared by most of its lines or rulings - prose fills its column profile with ink, tables leave blank
+# columns between their cells. Ruling lines are taken out of the ink before the text lines are found, so the
+# column lines of a bordered grid do not join all of its rows into one tall line.
+
+from collections import namedtuple
+
+import numpy as np
+
+from page_orientation import _otsu_threshold
+
+# Resolution of the render used to find the table regions.
+REGION_DPI = 72
+# Tesseract is most reliable with text lines of roughly this many pixels; much smaller lines drop below
+# img2table's min_confidence, much larger ones only cost time.
+TARGET_LINE_PX = 32
+MIN_DPI = 150
+MAX_DPI = 400
+# Distances in inches, so they hold at any render resolution.
+BLOCK_GAP = 0.25
+COLUMN_GAP = 0.12
+REGION_PADDING = 0.1
+# Height below which an ink row run is a speck or what is left of a ruling rather than a text line.
+MIN_LINE_HEIGHT = 0.04
+# Straight ink runs at least this long are rulings; letters and digits are far shorter.
+RULING_LENGTH = 0.4
+# A block needs this many text lines to be considered a table.
+MIN_TABLE_LINES = 3
+# A column is a gap when at most this share of the block's lines has ink in it (spanning headers allowed).
+GAP_LINE_SHARE = 0.2
+
+# box is (left, top, right, bottom) in inches on the upright page; dpi is the resolution to OCR it at.
+TableRegion = namedtuple("TableRegion", ["box", "line_height", "dpi"])
+
+def region_settings():
+    """Settings that change which regions are found and at what resolution they are OCR'd."""
+    return {"region_dpi": REGION_DPI, "target_line_px": TARGET_LINE_PX, "min_dpi": MIN_DPI, "max_dpi": MAX_DPI,
+            "block_gap": BLOCK_GAP, "column_gap": COLUMN_GAP, "padding": REGION_PADDING,
+            "min_line_height": MIN_LINE_HEIGHT, "ruling_length": RULING_LENGTH, "min_table_lines": MIN_TABLE_LINES,
+            "gap_line_share": GAP_LINE_SHARE}
+
+def _runs(mask):
+    """(start, end) of every run of True values in a 1-D mask, end exclusive."""
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.astype(np.int8), [0]])))
+    return list(zip(edges[::2], edges[1::2]))
+
+def dpi_for_line_height(line_height):
+    """Render resolution that gives text lines of `line_height` inches about TARGET_LINE_PX pixels."""
+    dpi = TARGET_LINE_PX / max(line_height, 1e-3)
+    # Round up to a multiple of 25 so regions of similar text share one render
+    return int(min(max(np.ceil(dpi / 25) * 25, MIN_DPI), MAX_DPI))
+
+def _ruling_mask(ink, length):
+    """Pixels of the horizontal ink runs at least `length` pixels long."""
+    height, width = ink.shape
+    if width < length:
+        return np.zeros_like(ink)
+    counts = np.zeros((height, width + 1), np.int32)
+    counts[:, 1:] = np.cumsum(ink, axis=1)
+    # full[:, s]: the `length` pixels starting at column s are all ink
+    full = (counts[:, length:] - counts[:, :-length]) == length
+    starts = np.zeros((height, full.shape[1] + 1), np.int32)
+    starts[:, 1:] = np.cumsum(full, axis=1)
+    # A pixel belongs to a ruling when a full window starts between `length` - 1 columns before it and itself
+    columns = np.arange(width)
+    last = np.minimum(columns + 1, full.shape[1])
+    first = np.clip(columns - length + 1, 0, full.shape[1])
+    return starts[:, last] - starts[:, first] > 0
+
+def _blocks(line_runs, gap, spanned):
+    """Groups text lines into blocks; `spanned` marks the rows crossed by vertical rulings, which hold the
+    rows of a bordered table together however far apart they are."""
+    blocks, current = [], [line_runs[0]]
+    for run in line_runs[1:]:
+        if run[0] - current[-1][1] > gap and not spanned[current[-1][1]:run[0]].all():
+            blocks.append(current)
+            current = []
+        current.append(run)
+    blocks.append(current)
+    return blocks
+
+def find_table_regions(image, dpi=REGION_DPI):
+    """Table regions of an upright page image rendered at `dpi`, top to bottom."""
+    gray = np.asarray(image.convert("L"))
+    ink = gray < _otsu_threshold(gray)
+    length = max(int(RULING_LENGTH * dpi), 2)
+    horizontal = _ruling_mask(ink, length)
+    vertical = _ruling_mask(ink.T, length).T
+    text = ink & ~horizontal & ~vertical
+    line_runs = _runs(text.any(axis=1))
+    if not line_runs:
+        return []
+
+    height, width = ink.shape
+    padding = int(REGION_PADDING * dpi)
+    spanned = vertical.any(axis=1)
+    edge = spanned | horizontal.any(axis=1)
+    regions = []
+    for block in _blocks(line_runs, BLOCK_GAP * dpi, spanned):
+        text_lines = [(start, end) for start, end in block if end - start >= MIN_LINE_HEIGHT * dpi]
+        if len(text_lines) < MIN_TABLE_LINES:
+            continue
+
+        # Take in the border rulings just above and below the text
+        top, bottom = block[0][0], block[-1][1]
+        while top > 0 and edge[top - 1]:
+            top -= 1
+        while bottom < height and edge[bottom]:
+            bottom += 1
+        columns = np.flatnonzero(ink[top:bottom].any(axis=0))
+        left, right = columns[0], columns[-1] + 1
+
+        # Ruled: two rulings across most of the block, or two column lines down most of it
+        row_rulings = horizontal[top:bottom, left:right].sum(axis=1) >= 0.6 * (right - left)
+        column_rulings = vertical[top:bottom, left:right].sum(axis=0) >= 0.6 * (bottom - top)
+        ruled = len(_runs(row_rulings)) >= 2 or len(_runs(column_rulings)) >= 2
+        line_ink = np.array([text[start:end, left:right].any(axis=0) for start, end in text_lines])
+        blank = line_ink.mean(axis=0) <= GAP_LINE_SHARE
+        gaps = [run for run in _runs(blank) if run[1] - run[0] >= COLUMN_GAP * dpi]
+        if not ruled and not gaps:
+            continue
+
+        line_height = float(np.median([end - start for start, end in text_lines])) / dpi
+        box = (max(left - padding, 0) / dpi, max(top - padding, 0) / dpi,
+               min(right + padding, width) / dpi, min(bottom + padding, height) / dpi)
+        regions.append(TableRegion(box, round(line_height, 3), dpi_for_line_height(line_height)))
+    return regions
+
+def region_pixels(region, dpi):
+    """Crop box of a region in an image rendered at `dpi`."""
+    return tuple(int(round(value * dpi)) for value in region.box)
+
+def region_share(regions, image, dpi):
+    """Share of the page's pixels that lies inside the regions (what is left for OCR)."""
+    area = sum((right - left) * (bottom - top) for left, top, right, bottom in (r.box for r in regions))
+    return area * dpi * dpi / max(image.width * image.height, 1)
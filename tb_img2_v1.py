@@ -1,6 +1,6 @@
 import os 
 from img2table.document import PDF, Image
-from img2table.ocr import TesseractOCR
+from warm_ocr import ocr_from_env
 import sys
 import cv2
 print(hasattr(cv2.ximgproc, 'niBlackThreshold'))
@@ -31,7 +31,7 @@ def main():
     implicit_columns_input= input("Does the document contain implicit columns? (Y/N):").strip().lower()
     implicit_columns = True if implicit_columns_input == "y" else False
 
-    ocr = TesseractOCR(n_threads=1, lang ="eng")
+    ocr = ocr_from_env(lang="eng")
 
     output_excel = input("Enter the desired output Excel file name (e.g, output.xlsx):").strip()
     if not output_excel.endswith(".xlsx"):
@@ -2,7 +2,7 @@ import os
 import sys
 from pdf2image import convert_from_path
 from img2table.document import PDF, Image
-from img2table.ocr import TesseractOCR
+from warm_ocr import ocr_from_env
 
 def parse_page_numbers(page_input, total_pages):
     """Parses a user input string like '1,3,5-7' into a list of integers."""
@@ -63,7 +63,7 @@ def main():
     implicit_rows = input("Does the document contain implicit rows? (Y/N): ").strip().lower() == "y"
     implicit_columns = input("Does the document contain implicit columns? (Y/N): ").strip().lower() == "y"
 
-    ocr = TesseractOCR(n_threads=1, lang="eng")
+    ocr = ocr_from_env(lang="eng")
 
     output_excel = input("Enter the desired output Excel file name (e.g., output.xlsx): ").strip()
     if not output_excel.endswith(".xlsx"):
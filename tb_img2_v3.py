@@ -1,12 +1,82 @@
 #This version of the code can take multiple pdf/images as input and if they have portrait tables in them. This code can extract those tables.
 
+import argparse
+import io
 import os
 import sys
+import time
 # import subprocess
-from pdf2image import convert_from_path
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import xlsxwriter
+from pdf2image import convert_from_path, pdfinfo_from_path
 from img2table.document import PDF, Image
-from img2table.ocr import TesseractOCR
 from PIL import Image as PILImage  # for image rotation
+from extraction_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ExtractionCache
+from job_journal import JobJournal
+from page_orientation import LOW_CONFIDENCE, detect_orientations
+from pipeline_profiler import configure as configure_profiling, cprofiled, stage, timed_method
+from pipeline_profiler import enabled as profiling_enabled, load as load_profile, print_summary
+from table_dataset import DEFAULT_DATASET_DIR, clear_source, write_page_tables
+from table_regions import MAX_DPI, REGION_DPI, find_table_regions, region_pixels, region_settings, region_share
+from text_layer import extract_page_tables
+from warm_ocr import backend_name, configure as configure_ocr, limit_omp_threads, ocr_from_env
+
+# Resolution used when rendering PDF pages (pdf2image's own default).
+RENDER_DPI = 200
+# Upper bound on how many rendered pages are kept in memory at the same time.
+MAX_PAGES_IN_MEMORY = 2
+
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]
+
+# One unit of extraction work: a single page of a file and the way it is extracted
+# ("landscape" = PDF text extraction, "portrait" = rendered and rotated, "image" = whole image file).
+# `options` optionally overrides the run-wide extraction flags for this page only, and `rotation`
+# the angle a portrait page is rotated by (PIL convention, -90 when not given).
+PageTask = namedtuple("PageTask", ["file_path", "kind", "page", "options", "rotation"], defaults=(None, None))
+
+# Per-process state: the renderer of the file being processed and the OCR instances, created on first use.
+_renderers = {}
+_ocr_instances = {}
+
+def get_pdf_page_count(file_path):
+    """Reads the page count from the PDF metadata without rendering any page."""
+    return int(pdfinfo_from_path(file_path)["Pages"])
+
+class PageRenderer:
+    """Renders single PDF pages on demand and keeps at most `max_pages_in_memory` of them."""
+
+    def __init__(self, file_path, dpi=RENDER_DPI, max_pages_in_memory=MAX_PAGES_IN_MEMORY):
+        self.file_path = file_path
+        self.dpi = dpi
+        self.max_pages_in_memory = max(1, max_pages_in_memory)
+        self._pages = OrderedDict()
+
+    def render(self, page, dpi=None):
+        """Returns the PIL image of a 1-based page (at `dpi`, the renderer's resolution by default),
+        rendering it only if it is not already held."""
+        key = (page, dpi or self.dpi)
+        if key in self._pages:
+            self._pages.move_to_end(key)
+            return self._pages[key]
+
+        # Drop the least recently used pages before rendering a new one so the cap is never exceeded.
+        while len(self._pages) >= self.max_pages_in_memory:
+            self._pages.popitem(last=False)
+
+        with stage("render", file=self.file_path, page=page, dpi=key[1]):
+            image = convert_from_path(self.file_path, dpi=key[1], first_page=page, last_page=page)[0]
+        self._pages[key] = image
+        return image
+
+    def release(self, page):
+        """Frees every render of a page once it is no longer needed."""
+        for key in [key for key in self._pages if key[0] == page]:
+            del self._pages[key]
+
+    def clear(self):
+        self._pages.clear()
 
 def parse_page_numbers(page_input, total_pages):
     """Parses a user input string like '1,3,5-7' into a list of integers."""
@@ -94,19 +164,39 @@ def parse_page_numbers(page_input, total_pages):
 
             os.remove(temp_path)    
 
-def process_pdf(file_path, ocr, implicit_rows, implicit_columns, borderless_tables):
-    """Processes a PDF file with user-specified portrait and landscape pages."""
-    # Convert PDF pages to images to count pages
-    images = convert_from_path(file_path)
-    total_pages = len(images)
-    print(f"Total pages in {file_path}: {total_pages}")
+def ask_detected_orientations(file_path, selected_pages, orientation_method="profile"):
+    """Detects the orientation of the selected pages and lets the user flip any of them."""
+    orientations = detect_orientations(file_path, selected_pages, method=orientation_method)
+    for o in orientations:
+        warning = " ⚠️ low confidence" if o.confidence < LOW_CONFIDENCE else ""
+        print(f"  Page {o.page}: {o.orientation} (confidence {o.confidence:.2f}, {o.method}){warning}")
 
+    flip_input = input("Enter page numbers whose orientation is wrong (leave blank to accept): ").strip()
+    flipped = parse_page_numbers(flip_input, max(selected_pages)) if flip_input else []
+
+    portrait_pages, landscape_pages, rotations = [], [], {}
+    for o in orientations:
+        is_portrait = (o.orientation == "portrait") != (o.page in flipped)
+        if is_portrait:
+            portrait_pages.append(o.page)
+            rotations[o.page] = o.rotation if o.orientation == "portrait" else -90
+        else:
+            landscape_pages.append(o.page)
+    return portrait_pages, landscape_pages, rotations
+
+def ask_pdf_pages(file_path, total_pages, orientation_method="profile"):
+    """Asks the user which pages of a PDF to process and which of them are portrait or landscape.
+    Returns (portrait pages, landscape pages, {portrait page: rotation})."""
     # Ask user which pages to process
     page_input = input(f"Enter page numbers to process for {file_path} (1-{total_pages}, e.g., 1->0 , 2->1): ").strip()
     selected_pages = parse_page_numbers(page_input, total_pages)
     if not selected_pages:
         print(f"No valid pages selected for {file_path}. Skipping...")
-        return
+        return [], [], {}
+
+    # Let the pages be classified from low-resolution thumbnails instead of typing them in
+    if input("Detect portrait/landscape pages automatically? (Y/N): ").strip().lower() == "y":
+        return ask_detected_orientations(file_path, selected_pages, orientation_method)
 
     # Ask which pages have portrait tables
     portrait_choice = input("Do any of these pages contain portrait tables? (Y/N): ").strip().lower() == "y"
@@ -122,73 +212,498 @@ def process_pdf(file_path, ocr, implicit_rows, implicit_columns, borderless_tabl
     if landscape_choice:
         landscape_input = input("Enter page numbers (from the selected pages) that are landscape (e.g., 1->0 , 2->1): ").strip()
         landscape_pages = parse_page_numbers(landscape_input, total_pages)
-        landscape_pages = [p-1 for p in landscape_pages if p in selected_pages]
+        landscape_pages = [p for p in landscape_pages if p in selected_pages]
 
-    # Process landscape pages using PDF extraction (if any)
-    if landscape_pages:
-        doc_landscape = PDF(file_path, pages=sorted(landscape_pages), pdf_text_extraction=True)
-        output_excel_landscape = os.path.splitext(os.path.basename(file_path))[0] + "_landscape.xlsx"
-        try:
-            doc_landscape.to_xlsx(dest=output_excel_landscape,
-                                  ocr=ocr,
-                                  implicit_rows=implicit_rows,
-                                  implicit_columns=implicit_columns,
-                                  borderless_tables=borderless_tables,
-                                  min_confidence=50)
-            print(f"✅ Success: Excel file created at {output_excel_landscape} for landscape pages.")
-        except Exception as e:
-            print(f"❌ An error occurred while processing landscape pages for {file_path}:", e)
+    return portrait_pages, landscape_pages, {}
 
-    # Process portrait pages separately
-    if portrait_pages:
-        for p in portrait_pages:
-            original_image = images[p - 1]
-            rotated_image = original_image.rotate(-90, expand=True)
+def build_pdf_tasks(file_path, portrait_pages, landscape_pages, rotations=None):
+    """Splits a PDF into page tasks: all landscape pages first, then each portrait page."""
+    rotations = rotations or {}
+    tasks = [PageTask(file_path, "landscape", p) for p in sorted(landscape_pages)]
+    tasks += [PageTask(file_path, "portrait", p, rotation=rotations.get(p)) for p in sorted(portrait_pages)]
+    return tasks
 
-            temp_path = f"temp_page_{p}.png"
-            rotated_image.save(temp_path)
-            doc_img = Image(temp_path, detect_rotation=False)
-            output_excel_portrait = os.path.splitext(os.path.basename(file_path))[0] + f"_portrait_page_{p}.xlsx"
+def plan_file(file_path, orientation_method="profile"):
+    """Returns the page tasks for a file, asking the user for page choices when it is a PDF."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        total_pages = get_pdf_page_count(file_path)
+        print(f"Total pages in {file_path}: {total_pages}")
+        portrait_pages, landscape_pages, rotations = ask_pdf_pages(file_path, total_pages, orientation_method)
+        return build_pdf_tasks(file_path, portrait_pages, landscape_pages, rotations)
+    elif ext in IMAGE_EXTENSIONS:
+        return [PageTask(file_path, "image", None)]
+    else:
+        print(f"Unsupported file type: {file_path}. Skipping...")
+        return []
 
-            try:
-                doc_img.to_xlsx(dest=output_excel_portrait,
-                                ocr=ocr,
-                                implicit_rows=implicit_rows,
-                                implicit_columns=implicit_columns,
-                                borderless_tables=borderless_tables,
-                                min_confidence=50)
-                print(f"✅ Success: Excel file created at {output_excel_portrait} for portrait page {p}.")
-            except Exception as e:
-                print(f"❌ An error occurred while processing portrait page {p} for {file_path}:", e)
+def image_buffer(image):
+    """Encodes a PIL image as an uncompressed in-memory BMP, which img2table decodes with a plain copy."""
+    buffer = io.BytesIO()
+    image.save(buffer, format="BMP")
+    buffer.seek(0)
+    return buffer
 
-            os.remove(temp_path)    
+def get_renderer(file_path, max_pages_in_memory=MAX_PAGES_IN_MEMORY):
+    """Returns the page renderer of the file currently being processed, replacing the previous one."""
+    renderer = _renderers.get(file_path)
+    if renderer is None or renderer.max_pages_in_memory != max(1, max_pages_in_memory):
+        _renderers.clear()
+        renderer = PageRenderer(file_path, max_pages_in_memory=max_pages_in_memory)
+        _renderers[file_path] = renderer
+    return renderer
 
+def get_ocr(lang="eng"):
+    """Returns this process's OCR instance, creating it only once a page actually needs OCR."""
+    if lang not in _ocr_instances:
+        # Warm tesserocr APIs when available (see warm_ocr), img2table's TesseractOCR otherwise
+        _ocr_instances[lang] = ocr_from_env(lang)
+    return _ocr_instances[lang]
+
+def _extract_region(image, dpi, region, ocr, options):
+    crop = image.crop(region_pixels(region, dpi))
+    with stage("encode"):
+        buffer = image_buffer(crop)
+    doc = Image(buffer, detect_rotation=False)
+    with stage("table_detection", dpi=dpi):
+        return doc.extract_tables(ocr=ocr, **options)
+
+def extract_table_regions(task, ocr, options, max_pages_in_memory=MAX_PAGES_IN_MEMORY):
+    """Finds the table regions of a scanned page on a low-DPI render and OCRs only those, each rendered at
+    the resolution its text size needs. Returns None when the page shows no table region, or when no
+    region yields a table (a false positive or a crop that clipped the table), so the whole page is tried."""
+    if task.kind == "image":
+        # Images cannot be rendered again: regions are found on a downscaled copy and cropped from the original
+        image = PILImage.open(task.file_path)
+        image_dpi = float(image.info.get("dpi", (RENDER_DPI,))[0]) or RENDER_DPI
+        scale = REGION_DPI / image_dpi
+        preview = image.convert("L").resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+
+        def upright_at(dpi):
+            return image, image_dpi
+    else:
+        renderer = get_renderer(task.file_path, max_pages_in_memory)
+
+        def upright_at(dpi):
+            page_image = renderer.render(task.page, dpi)
+            with stage("rotate"):
+                return page_image.rotate(task_rotation(task), expand=True), dpi
+        preview, _ = upright_at(REGION_DPI)
+
+    with stage("region_detection"):
+        regions = find_table_regions(preview, REGION_DPI)
+    if not regions:
+        if task.kind != "image":
+            renderer.release(task.page)
+        return None
+    if task.kind == "image":
+        regions = [region._replace(dpi=image_dpi) for region in regions]
+
+    found, retry = {}, []
+    with stage("region_ocr", regions=len(regions), share=round(region_share(regions, preview, REGION_DPI), 3)):
+        for dpi in sorted({region.dpi for region in regions}):
+            image, image_dpi = upright_at(dpi)
+            for region in [region for region in regions if region.dpi == dpi]:
+                found[region] = _extract_region(image, image_dpi, region, ocr, options)
+                if not found[region] and task.kind != "image" and dpi < MAX_DPI:
+                    retry.append(region)
+        if retry:
+            # img2table drops tables below min_confidence: give empty regions one try at the highest resolution
+            image, image_dpi = upright_at(MAX_DPI)
+            for region in retry:
+                found[region] = _extract_region(image, image_dpi, region, ocr, options)
+
+    if task.kind != "image":
+        renderer.release(task.page)
+    return [table for region in regions for table in found[region]] or None
+
+def extract_task(task, ocr, options, max_pages_in_memory=MAX_PAGES_IN_MEMORY, lang="eng", text_layer=True,
+                 adaptive_dpi=True):
+    """Extracts the tables of a single page task and returns them as a list.
+    PDF pages with a text layer are read directly; only scanned pages are rendered and OCR'd. With
+    adaptive_dpi only their table regions are OCR'd (the whole page when no region is found)."""
+    scanned = True
+    if text_layer and task.kind in ["landscape", "portrait"]:
+        with stage("text_layer"):
+            tables = extract_page_tables(task.file_path, task.page, options.get("borderless_tables", False))
+        # None means a scanned page; an empty list means no table was found, so let img2table have a look
+        if tables:
+            return tables
+        scanned = tables is None
+
+    ocr = ocr or get_ocr(lang)
+    if profiling_enabled():
+        # Separate the Tesseract calls from the rest of img2table's table detection
+        timed_method(ocr, "content", "ocr")
+
+    # Digital pages keep img2table's own handling (landscape pages read their text layer without OCR)
+    if adaptive_dpi and scanned:
+        tables = extract_table_regions(task, ocr, options, max_pages_in_memory)
+        if tables is not None:
+            return tables
+
+    if task.kind == "landscape":
+        # Landscape pages go through PDF extraction (img2table pages are 0-indexed)
+        doc = PDF(task.file_path, pages=[task.page - 1], pdf_text_extraction=True)
+        with stage("table_detection"):
+            extracted = doc.extract_tables(ocr=ocr, **options)
+        return [table for tables in extracted.values() for table in tables]
+
+    if task.kind == "portrait":
+        renderer = get_renderer(task.file_path, max_pages_in_memory)
+        original_image = renderer.render(task.page)
+        with stage("rotate"):
+            rotated_image = original_image.rotate(task_rotation(task), expand=True)
+        renderer.release(task.page)
+
+        # Hand the rotated page over in memory instead of through a temporary PNG
+        with stage("encode"):
+            buffer = image_buffer(rotated_image)
+        doc = Image(buffer, detect_rotation=False)
+        with stage("table_detection"):
+            return doc.extract_tables(ocr=ocr, **options)
+
+    doc = Image(task.file_path, detect_rotation=False)
+    with stage("table_detection"):
+        return doc.extract_tables(ocr=ocr, **options)
+
+def task_rotation(task):
+    """Rotation (in degrees) applied to the page before extraction."""
+    if task.kind != "portrait":
+        return 0
+    return -90 if task.rotation is None else task.rotation
+
+def run_task(task, ocr, options, max_pages_in_memory=MAX_PAGES_IN_MEMORY, lang="eng", cache=None,
+             text_layer=True, adaptive_dpi=True):
+    """Runs a page task and returns (task, tables, error) instead of raising.
+    Tables are served from / stored in `cache` (an ExtractionCache) when one is given."""
+    if task.options:
+        options = {**options, **task.options}
+    try:
+        with stage("page", file=task.file_path, page=task.page, kind=task.kind), cprofiled():
+            if cache is not None:
+                with stage("cache_lookup"):
+                    # Region settings only matter when regions are OCR'd; the backend changes the OCR text
+                    key = cache.key(task.file_path, task.page or 0, task_rotation(task), options, lang,
+                                    text_layer=text_layer, adaptive_dpi=adaptive_dpi,
+                                    ocr_backend=type(ocr).__name__ if ocr is not None else backend_name(),
+                                    regions=region_settings() if adaptive_dpi else None)
+                    tables = cache.get(key)
+                if tables is not None:
+                    return task, tables, None
+
+            tables = extract_task(task, ocr, options, max_pages_in_memory, lang, text_layer, adaptive_dpi)
+            if cache is not None:
+                with stage("cache_store"):
+                    cache.put(key, tables)
+            return task, tables, None
+    except Exception as e:
+        return task, None, e
+
+def _run_task_in_worker(task, **kwargs):
+    # Every worker process lazily builds its own OCR instance through get_ocr()
+    return run_task(task, None, **kwargs)
+
+def run_tasks(tasks, options, ocr=None, lang="eng", workers=1, max_pages_in_memory=MAX_PAGES_IN_MEMORY,
+              cache=None, text_layer=True, adaptive_dpi=True, executor=None):
+    """Yields (task, tables, error) for every task, in task order, using a process pool when workers > 1.
+    A long-running caller can pass its own `executor` so the workers (and their OCR models) stay warm."""
+    task_kwargs = {"options": options, "max_pages_in_memory": max_pages_in_memory, "lang": lang, "cache": cache,
+                   "text_layer": text_layer, "adaptive_dpi": adaptive_dpi}
+    if executor is not None or workers > 1:
+        # Worker processes share the cores: one OpenMP thread per Tesseract (inherited by the workers)
+        limit_omp_threads()
+    if executor is not None:
+        yield from executor.map(partial(_run_task_in_worker, **task_kwargs), tasks, chunksize=1)
+        return
+    if workers <= 1:
+        for task in tasks:
+            yield run_task(task, ocr, **task_kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() hands results back in submission order, so outputs match a serial run
+        yield from executor.map(partial(_run_task_in_worker, **task_kwargs), tasks, chunksize=1)
+
+def output_path_for(task):
+    """Returns the Excel file a page task is written to."""
+    name = os.path.splitext(os.path.basename(task.file_path))[0]
+    if task.kind == "landscape":
+        return name + "_landscape.xlsx"
+    if task.kind == "portrait":
+        return name + f"_portrait_page_{task.page}.xlsx"
+    return name + ".xlsx"
+
+def write_tables_xlsx(dest, tables_by_page):
+    """Writes {page index: tables} to an Excel file, one worksheet per table, like img2table's to_xlsx."""
+    workbook = xlsxwriter.Workbook(dest, {"in_memory": True})
+
+    cell_format = workbook.add_format({"align": "center", "valign": "vcenter", "text_wrap": True})
+    cell_format.set_border()
+
+    for page, tables in tables_by_page.items():
+        for idx, table in enumerate(tables):
+            sheet = workbook.add_worksheet(name=f"Page {page + 1} - Table {idx + 1}")
+            table._to_worksheet(sheet=sheet, cell_fmt=cell_format)
+
+    workbook.close()
+
+def _task_record(task, output_path, tables, error):
+    """Machine-readable outcome of a single page task."""
+    return {"file": task.file_path,
+            "kind": task.kind,
+            "page": task.page,
+            "output": output_path if error is None else None,
+            "tables": len(tables) if tables is not None else 0,
+            "status": "success" if error is None else "error",
+            "error": str(error) if error is not None else None}
+
+def _report_error(task, error):
+    if task.kind == "landscape":
+        print(f"❌ An error occurred while processing landscape page {task.page} for {task.file_path}:", error)
+    elif task.kind == "portrait":
+        print(f"❌ An error occurred while processing portrait page {task.page} for {task.file_path}:", error)
+    else:
+        print(f"❌ An error occurred while processing {task.file_path}:", error)
+
+def _write_output(output_path, results):
+    """Writes the successful results of one output file, reports each task and returns their records."""
+    tables_by_page = OrderedDict()
+    records = []
+    for task, tables, error in results:
+        records.append(_task_record(task, output_path, tables, error))
+        if error is not None:
+            _report_error(task, error)
+            continue
+        page = task.page - 1 if task.kind == "landscape" else 0
+        tables_by_page[page] = tables
+
+    if not tables_by_page:
+        return records
+
+    try:
+        with stage("write_xlsx", file=results[0][0].file_path, output=output_path):
+            write_tables_xlsx(output_path, tables_by_page)
+    except Exception as e:
+        print(f"❌ An error occurred while writing {output_path}:", e)
+        return [_task_record(task, output_path, None, error or e) for task, _, error in results]
+
+    task = results[0][0]
+    if task.kind == "landscape":
+        print(f"✅ Success: Excel file created at {output_path} for landscape pages.")
+    elif task.kind == "portrait":
+        print(f"✅ Success: Excel file created at {output_path} for portrait page {task.page}.")
+    else:
+        print(f"✅ Success: Excel file created at {output_path}")
+    return records
+
+def _write_dataset(dataset_dir, result, report=True):
+    """Streams the tables of one page into the Parquet dataset and returns the task record.
+    With report=False only dataset write failures are printed (the Excel output reports the rest)."""
+    task, tables, error = result
+    if error is not None:
+        if report:
+            _report_error(task, error)
+        return _task_record(task, None, tables, error)
 
-def process_image(file_path, ocr, implicit_rows, implicit_columns, borderless_tables):
-    """Processes an image file (non-PDF)."""
     try:
-        doc = Image(file_path, detect_rotation=False)
-        output_excel = os.path.splitext(os.path.basename(file_path))[0] + ".xlsx"
-        doc.to_xlsx(dest=output_excel,
-                    ocr=ocr,
-                    implicit_rows=implicit_rows,
-                    implicit_columns=implicit_columns,
-                    borderless_tables=borderless_tables,
-                    min_confidence=50)
-        print(f"✅ Success: Excel file created at {output_excel}")
+        with stage("write_parquet", file=task.file_path, page=task.page, kind=task.kind):
+            fragment = write_page_tables(dataset_dir, task.file_path, task.page, task.kind, tables)
     except Exception as e:
-        print(f"❌ An error occurred while processing {file_path}:", e)
+        print(f"❌ An error occurred while writing page {task.page} of {task.file_path} to {dataset_dir}:", e)
+        return _task_record(task, None, None, e)
+
+    if report:
+        print(f"✅ Success: {len(tables)} table(s) from {task.file_path} page {task.page or 1} added to {dataset_dir}")
+    return _task_record(task, fragment, tables, None)
+
+def _merge_records(record, dataset_record):
+    """Record of a task written to both outputs: a failure in either one marks the task as failed."""
+    if dataset_record is None or record["status"] == "error" or dataset_record["status"] == "success":
+        return record
+    return {**record, "output": None, "status": "error", "error": dataset_record["error"]}
+
+def write_results(results, output_dir="", output_format="xlsx", dataset_dir=DEFAULT_DATASET_DIR,
+                  journal=None, keep_sources=()):
+    """Groups ordered task results by output file, writes each file as soon as it is complete
+    and returns one record per task.
+
+    output_format is "xlsx" (one workbook per landscape group / portrait page / image), "parquet"
+    (every table streamed into the consolidated dataset in `dataset_dir`) or "both".
+    Each record is appended to `journal` as soon as its output is written; the dataset partitions of
+    `keep_sources` are not cleared (a resumed run adds to them)."""
+    records = []
+    current_path, pending, dataset_records = None, [], []
+    cleared_sources = set(keep_sources)
+
+    def finish(path, group, group_dataset_records):
+        group_records = [_merge_records(record, dataset_record) for record, dataset_record
+                         in zip(_write_output(path, group), group_dataset_records)]
+        if journal is not None:
+            for (task, _, _), record in zip(group, group_records):
+                journal.record(task, record)
+        return group_records
+
+    for result in results:
+        record = None
+        if output_format in ["parquet", "both"]:
+            # Start each document's partition afresh so pages dropped since the last run disappear
+            if result[0].file_path not in cleared_sources:
+                clear_source(dataset_dir, result[0].file_path)
+                cleared_sources.add(result[0].file_path)
+            record = _write_dataset(dataset_dir, result, report=output_format == "parquet")
+            if output_format == "parquet":
+                if journal is not None:
+                    journal.record(result[0], record)
+                records.append(record)
+                continue
+
+        output_path = os.path.join(output_dir, output_path_for(result[0]))
+        if pending and output_path != current_path:
+            records += finish(current_path, pending, dataset_records)
+            pending, dataset_records = [], []
+        current_path = output_path
+        pending.append(result)
+        # In "both" mode the dataset outcome is merged into the workbook's record once that is written
+        dataset_records.append(record)
+    if pending:
+        records += finish(current_path, pending, dataset_records)
+    return records
+
+def pending_tasks(tasks, journal, output_format="xlsx"):
+    """The tasks the journal has not recorded as done. Workbooks are always rewritten as a whole, so with
+    Excel output every page of a workbook that still has an unfinished page is kept."""
+    if output_format == "parquet":
+        return [task for task in tasks if not journal.is_done(task)]
+    unfinished = {output_path_for(task) for task in tasks if not journal.is_done(task)}
+    return [task for task in tasks if output_path_for(task) in unfinished]
+
+def run_resumable(tasks, options, journal, output_dir="", output_format="xlsx", dataset_dir=DEFAULT_DATASET_DIR,
+                  retries=2, backoff=5.0, **run_kwargs):
+    """
+    Runs the tasks the journal has not recorded as done, retrying failed ones up to `retries` times
+    with exponential backoff (backoff, 2 * backoff, ... seconds). Pages already extracted by an earlier
+    attempt or run come back from the extraction cache when a workbook has to be rewritten.
+    Returns the latest record of every task.
+    """
+    pending = pending_tasks(tasks, journal, output_format)
+    if len(pending) < len(tasks):
+        print(f"Resuming from {journal.path}: {len(tasks) - len(pending)} of {len(tasks)} page tasks already done.")
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"Retrying {len(pending)} page task(s) in {delay:g}s (attempt {attempt + 1} of {retries + 1})...")
+            time.sleep(delay)
+        keep_sources = {task.file_path for task in tasks if journal.is_done(task)}
+        write_results(run_tasks(pending, options, **run_kwargs), output_dir, output_format, dataset_dir,
+                      journal=journal, keep_sources=keep_sources)
+        pending = pending_tasks(pending, journal, output_format)
+
+    return [record for record in map(journal.latest, tasks) if record is not None]
+
+def print_report(report):
+    """Prints the final state of a journaled run."""
+    print(f"Done: {report['succeeded']} of {report['tasks']} page tasks succeeded, "
+          f"{report['failed']} failed, {report['not_run']} not run ({report['tables']} tables).")
+    for failure in report["failures"]:
+        print(f"❌ {failure['file']} page {failure['page'] or 1} ({failure['kind']}) failed after "
+              f"{failure['attempts']} attempt(s):", failure["error"])
+
+def extraction_options(implicit_rows, implicit_columns, borderless_tables, min_confidence=50):
+    """Bundles the img2table extraction flags so they can be passed to workers."""
+    return {"implicit_rows": implicit_rows,
+            "implicit_columns": implicit_columns,
+            "borderless_tables": borderless_tables,
+            "min_confidence": min_confidence}
+
+def process_pdf(file_path, ocr, implicit_rows, implicit_columns, borderless_tables,
+                max_pages_in_memory=MAX_PAGES_IN_MEMORY):
+    """Processes a PDF file with user-specified portrait and landscape pages."""
+    # Read the page count from the PDF metadata; pages are only rendered when needed
+    total_pages = get_pdf_page_count(file_path)
+    print(f"Total pages in {file_path}: {total_pages}")
+
+    portrait_pages, landscape_pages, rotations = ask_pdf_pages(file_path, total_pages)
+    tasks = build_pdf_tasks(file_path, portrait_pages, landscape_pages, rotations)
+    options = extraction_options(implicit_rows, implicit_columns, borderless_tables)
+    write_results(run_tasks(tasks, options, ocr=ocr, max_pages_in_memory=max_pages_in_memory))
+
+def process_image(file_path, ocr, implicit_rows, implicit_columns, borderless_tables):
+    """Processes an image file (non-PDF)."""
+    options = extraction_options(implicit_rows, implicit_columns, borderless_tables)
+    write_results(run_tasks([PageTask(file_path, "image", None)], options, ocr=ocr))
 
 def process_file(file_path, ocr, implicit_rows, implicit_columns, borderless_tables):
     ext = os.path.splitext(file_path)[1].lower()
     if ext == ".pdf":
         process_pdf(file_path, ocr, implicit_rows, implicit_columns, borderless_tables)
-    elif ext in [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]:
+    elif ext in IMAGE_EXTENSIONS:
         process_image(file_path, ocr, implicit_rows, implicit_columns, borderless_tables)
     else:
         print(f"Unsupported file type: {file_path}. Skipping...")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract tables from PDF/image files into Excel.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes; pages of all files are extracted in parallel when > 1.")
+    parser.add_argument("--max-pages-in-memory", type=int, default=MAX_PAGES_IN_MEMORY,
+                        help="Maximum number of rendered pages each process keeps in memory.")
+    parser.add_argument("--lang", default="eng", help="Tesseract OCR language.")
+    parser.add_argument("--ocr-backend", choices=["auto", "warm", "cli"], default=None,
+                        help="Tesseract through long-lived tesserocr APIs (warm) or one CLI process per image (cli).")
+    parser.add_argument("--ocr-threads", type=int, default=None, help="Tesseract threads per process.")
+    parser.add_argument("--ocr-batch-size", type=int, default=None,
+                        help="Images handed to one warm Tesseract API at a time.")
+    parser.add_argument("--orientation-method", choices=["profile", "osd"], default="profile",
+                        help="How pages are classified when automatic orientation detection is chosen.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory of the extraction cache; unchanged pages are not extracted again.")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Size limit of the extraction cache; least recently used entries are evicted.")
+    parser.add_argument("--no-cache", action="store_true", help="Always extract, never read or write the cache.")
+    parser.add_argument("--output-format", choices=["xlsx", "parquet", "both"], default="xlsx",
+                        help="Write one workbook per page group, one consolidated Parquet dataset, or both.")
+    parser.add_argument("--dataset-dir", default=DEFAULT_DATASET_DIR,
+                        help="Directory of the consolidated Parquet dataset.")
+    parser.add_argument("--profile-log", default=None,
+                        help="Append per-stage wall/CPU time and peak RSS as JSON lines to this file.")
+    parser.add_argument("--cprofile", default=None,
+                        help="Also run page tasks under cProfile, dumping stats to <path>.<pid>.")
+    parser.add_argument("--no-text-layer", action="store_true",
+                        help="Render and OCR every page, even PDF pages that have a text layer.")
+    parser.add_argument("--full-page-ocr", action="store_true",
+                        help="OCR whole scanned pages at the fixed render DPI instead of only their table regions.")
+    parser.add_argument("--journal", default=None,
+                        help="Job journal (JSON lines). Re-running with the same journal skips finished pages.")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="How often failed pages are retried within a journaled run.")
+    parser.add_argument("--retry-backoff", type=float, default=5.0,
+                        help="Seconds before the first retry; doubled for every further retry.")
+    return parser.parse_args(argv)
+
+def cache_from_args(args):
+    if args.no_cache:
+        return None
+    return ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
+def journal_settings(options, args, output_dir=""):
+    """Run settings that change the output of a page; a journal entry only counts for the same settings."""
+    return {"options": options,
+            "lang": args.lang,
+            "text_layer": not args.no_text_layer,
+            "adaptive_dpi": not args.full_page_ocr,
+            "output_format": args.output_format,
+            "output_dir": os.path.abspath(output_dir),
+            "dataset_dir": os.path.abspath(args.dataset_dir)}
+
 def main():
+    args = parse_args()
+    configure_profiling(args.profile_log, args.cprofile)
+    configure_ocr(args.ocr_backend, args.ocr_threads, args.ocr_batch_size)
+
     file_paths = input("Enter the paths to your PDF/Image files, separated by commas: ").strip().split(",")
     file_paths = [fp.strip() for fp in file_paths if fp.strip()]
     
@@ -199,11 +714,41 @@ def main():
     borderless_tables = input("Do the documents contain borderless tables? (Y/N): ").strip().lower() == "y"
     implicit_rows = input("Do the documents contain implicit rows? (Y/N): ").strip().lower() == "y"
     implicit_columns = input("Do the documents contain implicit columns? (Y/N): ").strip().lower() == "y"
-    
-    ocr = TesseractOCR(n_threads=1, lang="eng")
-    
+    options = extraction_options(implicit_rows, implicit_columns, borderless_tables)
+
+    # Collect the page choices of every file first so the work can be split across workers
+    tasks = []
     for file_path in file_paths:
-        process_file(file_path, ocr, implicit_rows, implicit_columns, borderless_tables)
+        tasks += plan_file(file_path, args.orientation_method)
+
+    run_kwargs = {"lang": args.lang,
+                  "workers": args.workers,
+                  "max_pages_in_memory": args.max_pages_in_memory,
+                  "cache": cache_from_args(args),
+                  "text_layer": not args.no_text_layer,
+                  "adaptive_dpi": not args.full_page_ocr}
+    if args.journal:
+        journal = JobJournal(args.journal, settings=journal_settings(options, args))
+        try:
+            run_resumable(tasks, options, journal,
+                          output_format=args.output_format,
+                          dataset_dir=args.dataset_dir,
+                          retries=args.retries,
+                          backoff=args.retry_backoff,
+                          **run_kwargs)
+        except KeyboardInterrupt:
+            print(f"\nInterrupted. Finished pages are recorded in {args.journal}; "
+                  "run again with the same --journal to continue.")
+            sys.exit(130)
+        report = journal.write_report(tasks)
+        print_report(report)
+    else:
+        write_results(run_tasks(tasks, options, **run_kwargs),
+                      output_format=args.output_format,
+                      dataset_dir=args.dataset_dir)
+
+    if args.profile_log and os.path.exists(args.profile_log):
+        print_summary(load_profile(args.profile_log))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+# Table extraction straight from the text layer of digital PDF pages. Pages that carry real text do not
+# need rendering or Tesseract: their characters and ruling lines are read with pdfplumber, rotated in
+# coordinate space when the text runs vertically (portrait tables), and laid out into rows and columns.
+
+from collections import Counter
+from statistics import median
+
+import pandas as pd
+import pdfplumber
+
+# A page needs at least this many visible characters to be treated as digital.
+MIN_TEXT_CHARS = 100
+# Horizontal gap (in character heights) that separates two cells on a line; smaller gaps separate words.
+CELL_GAP = 0.9
+WORD_GAP = 0.15
+
+class TextLayerTable:
+    """Table read from a PDF text layer. Provides the parts of img2table's ExtractedTable used by the scripts."""
+
+    def __init__(self, df, title=None):
+        self.df = df
+        self.title = title
+
+    def _to_worksheet(self, sheet, cell_fmt=None):
+        for r, row in enumerate(self.df.itertuples(index=False)):
+            for c, value in enumerate(row):
+                sheet.write(r, c, value, cell_fmt)
+
+def has_text_layer(pdf_page, min_chars=MIN_TEXT_CHARS):
+    """True when the page has enough extractable characters to skip OCR."""
+    return sum(1 for char in pdf_page.chars if char["text"].strip()) >= min_chars
+
+def text_rotation(chars):
+    """PIL-style rotation that makes the page's text upright, judged from the glyph matrices."""
+    votes = Counter()
+    for char in chars:
+        if char.get("upright", True):
+            votes[0] += 1
+        else:
+            # Text running bottom-to-top has a positive b in its text matrix and is turned clockwise
+            votes[-90 if char["matrix"][1] > 0 else 90] += 1
+    return votes.most_common(1)[0][0] if votes else 0
+
+def _rotate_box(obj, rotation, width, height):
+    """Returns (x0, x1, top, bottom) of a pdfplumber object after rotating the page by `rotation`."""
+    x0, x1, top, bottom = obj["x0"], obj["x1"], obj["top"], obj["bottom"]
+    if rotation == -90:
+        # Clockwise: (x, y) -> (height - y, x)
+        return height - bottom, height - top, x0, x1
+    if rotation == 90:
+        # Counter-clockwise: (x, y) -> (y, width - x)
+        return top, bottom, width - x1, width - x0
+    return x0, x1, top, bottom
+
+def _group_lines(boxes, char_height):
+    """Groups character boxes into text lines by their vertical centre."""
+    lines = []
+    for box in sorted(boxes, key=lambda b: (b[2] + b[3]) / 2):
+        center = (box[2] + box[3]) / 2
+        if lines and abs(center - lines[-1]["center"]) <= char_height / 2:
+            line = lines[-1]
+            line["boxes"].append(box)
+            line["center"] += (center - line["center"]) / len(line["boxes"])
+        else:
+            lines.append({"center": center, "boxes": [box]})
+    return [sorted(line["boxes"]) for line in lines]
+
+def _line_cells(line, char_height):
+    """Splits a text line into cells [(x0, x1, text)] at gaps wider than CELL_GAP."""
+    cells = []
+    for x0, x1, _, _, text in line:
+        if cells and x0 - cells[-1][1] <= CELL_GAP * char_height:
+            prev_x0, prev_x1, prev_text = cells[-1]
+            space = " " if x0 - prev_x1 > WORD_GAP * char_height else ""
+            cells[-1] = (prev_x0, max(prev_x1, x1), prev_text + space + text)
+        else:
+            cells.append((x0, x1, text))
+    return cells
+
+def _table_blocks(rows):
+    """Yields runs of consecutive multi-cell lines; a single-cell line between two of them stays in the run."""
+    block = []
+    for i, cells in enumerate(rows):
+        inside = len(cells) >= 2 or (block and i + 1 < len(rows) and len(rows[i + 1]) >= 2)
+        if inside:
+            block.append(cells)
+        else:
+            if len(block) >= 2:
+                yield block
+            block = []
+    if len(block) >= 2:
+        yield block
+
+def _gap_columns(block):
+    """Column intervals from the union of the cell extents of a block."""
+    intervals = sorted((x0, x1) for cells in block if len(cells) >= 2 for x0, x1, _ in cells)
+    columns = []
+    for x0, x1 in intervals:
+        if columns and x0 <= columns[-1][1]:
+            columns[-1][1] = max(columns[-1][1], x1)
+        else:
+            columns.append([x0, x1])
+    return columns
+
+def _ruling_columns(separators, block):
+    """Column intervals between vertical ruling lines that cross the block."""
+    left = min(x0 for cells in block for x0, _, _ in cells)
+    right = max(x1 for cells in block for _, x1, _ in cells)
+    inner = [x for x in separators if left < x < right]
+    bounds = [left] + inner + [right]
+    return [[bounds[i], bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+def _block_to_df(block, columns):
+    rows = []
+    for cells in block:
+        row = [None] * len(columns)
+        for x0, x1, text in cells:
+            center = (x0 + x1) / 2
+            idx = next((i for i, (c0, c1) in enumerate(columns) if c0 <= center <= c1),
+                       min(range(len(columns)), key=lambda i: abs(columns[i][0] - x0)))
+            row[idx] = text if row[idx] is None else row[idx] + " " + text
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def extract_text_tables(pdf_page, borderless_tables=False):
+    """Reads the tables of a digital page from its characters and ruling lines."""
+    chars = [char for char in pdf_page.chars if char["text"].strip()]
+    if not chars:
+        return []
+
+    rotation = text_rotation(chars)
+    width, height = float(pdf_page.width), float(pdf_page.height)
+    boxes = [_rotate_box(char, rotation, width, height) + (char["text"],) for char in chars]
+    char_height = median(b[3] - b[2] for b in boxes) or 1.0
+
+    # Vertical ruling lines of the rotated page delimit the columns of bordered tables
+    separators = []
+    for edge in pdf_page.edges:
+        x0, x1, top, bottom = _rotate_box(edge, rotation, width, height)
+        if x1 - x0 < 1 and bottom - top > 2 * char_height:
+            separators.append((x0 + x1) / 2)
+    # Double strokes and touching cell borders collapse into a single separator
+    merged = []
+    for x in sorted(separators):
+        if not merged or x - merged[-1] > 2:
+            merged.append(x)
+    separators = merged
+    if not separators and not borderless_tables:
+        return []
+
+    rows = [_line_cells(line, char_height) for line in _group_lines(boxes, char_height)]
+    tables = []
+    for block in _table_blocks(rows):
+        columns = _ruling_columns(separators, block) if len(separators) >= 2 else _gap_columns(block)
+        if len(columns) < 2:
+            continue
+        tables.append(TextLayerTable(_block_to_df(block, columns)))
+    return tables
+
+def extract_page_tables(file_path, page, borderless_tables=False, min_chars=MIN_TEXT_CHARS):
+    """Returns the text-layer tables of a 1-based PDF page, or None when the page has no text layer
+    (it is a scan and needs OCR)."""
+    with pdfplumber.open(file_path, pages=[page]) as pdf:
+        pdf_page = pdf.pages[0]
+        if not has_text_layer(pdf_page, min_chars):
+            return None
+        return extract_text_tables(pdf_page, borderless_tables)
@@ -0,0 +1,163 @@
+# Warm Tesseract OCR for img2table. img2table's TesseractOCR starts a tesseract process for every image, and
+# every process loads the language model again. WarmTesseractOCR keeps tesserocr API instances (Tesseract's
+# C++ API, model loaded once) alive for the life of the process and feeds them batches of images from a
+# persistent thread pool. The APIs return the same hOCR as the tesseract CLI, so img2table parses it unchanged
+# and the class can be used anywhere a TesseractOCR is expected.
+#
+# The scripts pick the backend with environment variables, so worker processes inherit the choice:
+#   OCR_BACKEND     "auto" (default: warm when tesserocr is installed), "warm" or "cli"
+#   OCR_THREADS     Tesseract APIs / threads per process (default 1)
+#   OCR_BATCH_SIZE  images handed to one API at a time (default 4)
+
+import importlib.util
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from img2table.ocr import TesseractOCR
+
+# tesserocr is imported on first use, after OMP_THREAD_LIMIT is set (see limit_omp_threads)
+tesserocr = None
+HAS_TESSEROCR = importlib.util.find_spec("tesserocr") is not None
+
+BACKEND_ENV = "OCR_BACKEND"
+THREADS_ENV = "OCR_THREADS"
+BATCH_SIZE_ENV = "OCR_BATCH_SIZE"
+DEFAULT_BATCH_SIZE = 4
+
+# The CLI wraps the page in a full XHTML document; the API only returns the page <div>
+HOCR_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>
+  <meta name='ocr-system' content='tesseract'/>
+  <meta name='ocr-capabilities' content='ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrp_wconf'/>
+ </head>
+ <body>
+{}
+ </body>
+</html>
+"""
+
+def limit_omp_threads():
+    """Keeps Tesseract to one OpenMP thread in this process and the processes it starts. Needed when several
+    APIs or workers share the cores; must happen before the Tesseract library loads."""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+def _load_tesserocr():
+    global tesserocr
+    if tesserocr is None:
+        limit_omp_threads()
+        import tesserocr as module
+        tesserocr = module
+    return tesserocr
+
+class WarmTesseractOCR(TesseractOCR):
+    """TesseractOCR backed by `n_threads` long-lived tesserocr APIs, each handed `batch_size` images at a time."""
+
+    def __init__(self, n_threads=1, lang="eng", psm=11, tessdata_dir=None, batch_size=DEFAULT_BATCH_SIZE):
+        if not HAS_TESSEROCR:
+            raise ImportError("WarmTesseractOCR needs tesserocr (pip install tesserocr)")
+        # TesseractOCR.__init__ is skipped: it checks the tesseract CLI, which this backend does not need
+        module = _load_tesserocr()
+        _, languages = module.get_languages(tessdata_dir) if tessdata_dir else module.get_languages()
+        missing = [part for part in lang.split("+") if part not in languages]
+        if missing:
+            raise EnvironmentError(f"Tesseract language(s) not installed: {', '.join(missing)}")
+        self.n_threads = n_threads
+        self.lang = lang
+        self.psm = psm
+        self.env = os.environ.copy()
+        if tessdata_dir:
+            self.env["TESSDATA_PREFIX"] = tessdata_dir
+        self.tessdata_dir = tessdata_dir
+        self.batch_size = max(1, batch_size)
+        self._apis = queue.Queue()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Models are loaded on first use, once per API, and reused for every later page
+        with self._lock:
+            if self._executor is None:
+                kwargs = {"path": self.tessdata_dir} if self.tessdata_dir else {}
+                for _ in range(max(1, self.n_threads)):
+                    self._apis.put(_load_tesserocr().PyTessBaseAPI(lang=self.lang, psm=self.psm, **kwargs))
+                self._executor = ThreadPoolExecutor(max_workers=max(1, self.n_threads))
+        return self._executor
+
+    def hocr(self, image, api=None):
+        """hOCR of one image (a grayscale or RGB array, as img2table's Document.images hands them over)."""
+        if api is None:
+            return self._run_batch([image])[0]
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, channels, channels * width)
+        return HOCR_TEMPLATE.format(api.GetHOCRText(0))
+
+    def _run_batch(self, images):
+        self._pool()
+        api = self._apis.get()
+        try:
+            return [self.hocr(image, api) for image in images]
+        finally:
+            self._apis.put(api)
+
+    def content(self, document):
+        images = list(document.images)
+        batches = [images[start:start + self.batch_size] for start in range(0, len(images), self.batch_size)]
+        return [hocr for batch in self._pool().map(self._run_batch, batches) for hocr in batch]
+
+    def close(self):
+        """Shuts the thread pool down and frees the Tesseract models."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            while not self._apis.empty():
+                self._apis.get().End()
+
+    def __getstate__(self):
+        # APIs and threads cannot be pickled; a copy sent to another process starts cold
+        state = self.__dict__.copy()
+        state.update(_apis=None, _executor=None, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._apis = queue.Queue()
+        self._lock = threading.Lock()
+
+def make_ocr(lang="eng", n_threads=1, batch_size=DEFAULT_BATCH_SIZE, backend="auto"):
+    """Returns a WarmTesseractOCR, or img2table's TesseractOCR for backend="cli" (or "auto" without tesserocr)."""
+    if backend == "warm" or (backend == "auto" and HAS_TESSEROCR):
+        return WarmTesseractOCR(n_threads=n_threads, lang=lang, batch_size=batch_size)
+    if backend not in ["auto", "cli"]:
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    return TesseractOCR(n_threads=n_threads, lang=lang)
+
+def backend_name():
+    """Name of the OCR class ocr_from_env() builds (part of the extraction cache key)."""
+    backend = os.environ.get(BACKEND_ENV, "auto")
+    if backend == "warm" or (backend == "auto" and HAS_TESSEROCR):
+        return WarmTesseractOCR.__name__
+    return TesseractOCR.__name__
+
+def configure(backend=None, n_threads=None, batch_size=None):
+    """Sets the OCR environment variables of this process and the worker processes it starts."""
+    for env, value in [(BACKEND_ENV, backend), (THREADS_ENV, n_threads), (BATCH_SIZE_ENV, batch_size)]:
+        if value is not None:
+            os.environ[env] = str(value)
+
+def ocr_from_env(lang="eng"):
+    """make_ocr() with the settings of OCR_BACKEND, OCR_THREADS and OCR_BATCH_SIZE."""
+    return make_ocr(lang,
+                    n_threads=int(os.environ.get(THREADS_ENV, 1)),
+                    batch_size=int(os.environ.get(BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE)),
+                    backend=os.environ.get(BACKEND_ENV, "auto"))
@@ -0,0 +1,288 @@
+# Watch mode for the img2table pipeline: polls one or more folders for new or changed PDFs/images and runs
+# them through tb_img2_v3's extraction without any prompts, so fresh reports reach the consolidated outputs
+# within seconds of arriving instead of at the next manual batch.
+#
+#   python watch_folder.py incoming/ scans/ --output-format parquet --dataset-dir extracted_tables
+#
+# A file is picked up once its size and modification time have not changed for --settle seconds (copies in
+# progress are left alone), and only when its content hash differs from the last one processed. The hashes
+# are kept in a state file, so a restarted watcher does not redo old files. A file that failed is retried
+# up to --retries times, after --retry-backoff seconds and twice as long before every further retry. Every
+# page of a PDF is planned like a manifest entry with "pages": "all" and "orientation": "auto". Settled files
+# wait in a bounded queue for --concurrency file threads, which share one persistent pool of extraction
+# processes (each keeping its OCR models warm). Each file rewrites only its own partition of the Parquet
+# dataset (and its own workbooks), so the outputs are updated file by file; files removed from the folders
+# are dropped from the dataset.
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from batch_manifest import plan_manifest_entry
+from extraction_cache import DEFAULT_CACHE_DIR, ExtractionCache, file_hash
+from table_dataset import DEFAULT_DATASET_DIR, clear_source
+from tb_img2_v3 import IMAGE_EXTENSIONS, MAX_PAGES_IN_MEMORY, extraction_options, run_tasks, write_results
+
+DEFAULT_STATE = ".watch_state.json"
+POLL_INTERVAL = 2.0
+SETTLE_SECONDS = 3.0
+QUEUE_SIZE = 16
+RETRIES = 3
+RETRY_BACKOFF = 60.0
+WATCHED_EXTENSIONS = [".pdf"] + IMAGE_EXTENSIONS
+
+def scan(folders, recursive=False):
+    """Returns {absolute path: (size, mtime_ns)} of the PDFs and images in the folders."""
+    found = {}
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            if not recursive:
+                dirs[:] = []
+            for name in files:
+                # Skip hidden files and Office lock files, which copy tools and editors leave behind
+                if name.startswith((".", "~$")) or os.path.splitext(name)[1].lower() not in WATCHED_EXTENSIONS:
+                    continue
+                path = os.path.abspath(os.path.join(root, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed between listing and stat
+                found[path] = (stat.st_size, stat.st_mtime_ns)
+    return found
+
+def process_path(file_path, options, executor=None, orientation_method="profile", output_dir="",
+                 output_format="parquet", dataset_dir=DEFAULT_DATASET_DIR, **run_kwargs):
+    """Extracts every page of a file and writes its outputs. Returns "success" or "error"."""
+    tasks, _ = plan_manifest_entry({"path": file_path, "pages": "all", "orientation": "auto",
+                                    "orientation_method": orientation_method})
+    records = write_results(run_tasks(tasks, options, executor=executor, **run_kwargs),
+                            output_dir, output_format, dataset_dir)
+    failed = sum(record["status"] == "error" for record in records)
+    tables = sum(record["tables"] for record in records)
+    if failed:
+        print(f"❌ {file_path}: {failed} of {len(records)} page task(s) failed, {tables} table(s) extracted")
+        return "error"
+    print(f"✅ {file_path}: {len(records)} page task(s), {tables} table(s) extracted")
+    return "success"
+
+class FolderWatcher:
+    """Polls folders and hands settled new or changed files to `process(path)` on worker threads."""
+
+    def __init__(self, folders, process, state_path=DEFAULT_STATE, settle=SETTLE_SECONDS, queue_size=QUEUE_SIZE,
+                 concurrency=2, recursive=False, on_removed=None, retries=RETRIES, backoff=RETRY_BACKOFF):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.process = process
+        self.state_path = state_path
+        self.settle = settle
+        self.concurrency = max(1, concurrency)
+        self.recursive = recursive
+        self.on_removed = on_removed
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.state = self._load_state()
+        self._seen = {}
+        self._busy = set()
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self):
+        # Write a temporary file and rename it so a crash never leaves half a state file behind
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def _retry_due(self, known):
+        """True when a failed file has retries left and its backoff has passed."""
+        return (known["status"] == "error"
+                and known.get("attempts", 1) <= self.retries
+                and time.time() >= known.get("retry_after", 0))
+
+    def _watched(self, path):
+        return any(os.path.commonpath([path, folder]) == folder for folder in self.folders)
+
+    def poll(self):
+        """Scans the folders once, queues every settled file whose content changed and returns how many."""
+        now = time.monotonic()
+        current = scan(self.folders, self.recursive)
+        queued = 0
+        for path, signature in current.items():
+            seen = self._seen.get(path)
+            if seen is None or seen[0] != signature:
+                # New or still being written: start (or restart) its settle timer
+                self._seen[path] = (signature, now)
+                continue
+            if now - seen[1] < self.settle:
+                continue
+
+            with self._lock:
+                if path in self._busy:
+                    continue
+                known = self.state.get(path)
+            retry = known is not None and self._retry_due(known)
+            if known is not None and known["signature"] == list(signature) and not retry:
+                continue
+            try:
+                digest = file_hash(path)
+            except OSError as e:
+                # Removed or locked since the scan: the next poll looks at it again
+                print(f"Skipping {path} for now:", e)
+                continue
+            if known is not None and known["sha256"] == digest and not retry:
+                # Touched or copied again without changing: remember the new stamp, nothing to extract
+                with self._lock:
+                    known["signature"] = list(signature)
+                    self._save_state()
+                continue
+
+            with self._lock:
+                self._busy.add(path)
+            # Blocks while the queue is full, which holds the scanner back until the workers catch up
+            self.queue.put((path, digest, signature))
+            queued += 1
+
+        for path in [path for path in self._seen if path not in current]:
+            del self._seen[path]
+        with self._lock:
+            removed = [path for path in self.state
+                       if path not in current and path not in self._busy and self._watched(path)]
+        for path in removed:
+            if self.on_removed is not None:
+                try:
+                    self.on_removed(path)
+                except OSError as e:
+                    # Keep the state entry so the next poll tries again
+                    print(f"❌ Could not remove {path} from the outputs:", e)
+                    continue
+            print(f"Removed {path} from the outputs")
+            with self._lock:
+                del self.state[path]
+                self._save_state()
+        return queued
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            path, digest, signature = item
+            try:
+                status = self.process(path)
+            except Exception as e:
+                print(f"❌ An error occurred while processing {path}:", e)
+                status = "error"
+            # Failed files are recorded too, with the time of their next retry; once the retries are used up
+            # they are only tried again when their content changes
+            with self._lock:
+                self._busy.discard(path)
+                previous = self.state.get(path)
+                attempts = 1
+                if previous is not None and previous["sha256"] == digest and previous["status"] == "error":
+                    attempts = previous.get("attempts", 1) + 1
+                entry = {"sha256": digest,
+                         "signature": list(signature),
+                         "status": status,
+                         "attempts": attempts,
+                         "processed": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                if status == "error":
+                    delay = self.backoff * 2 ** (attempts - 1)
+                    entry["retry_after"] = time.time() + delay
+                    if attempts <= self.retries:
+                        print(f"Retrying {path} in {delay:g}s (retry {attempts} of {self.retries})")
+                self.state[path] = entry
+                self._save_state()
+            self.queue.task_done()
+
+    def run(self, interval=POLL_INTERVAL, once=False):
+        """Polls every `interval` seconds until interrupted. With once=True the files already in the folders
+        are processed without waiting for them to settle, and the call returns when they are done."""
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            if once:
+                self.settle = 0
+                self.poll()
+                self.poll()
+            else:
+                print(f"Watching {', '.join(self.folders)} (Ctrl-C to stop)...")
+                while True:
+                    self.poll()
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\nStopping: finishing the files already queued...")
+        finally:
+            for _ in threads:
+                self.queue.put(None)
+            for thread in threads:
+                thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch folders and extract the tables of new or changed PDFs/images.")
+    parser.add_argument("folders", nargs="+", help="Folders to watch.")
+    parser.add_argument("--recursive", action="store_true", help="Also watch subfolders.")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between folder scans.")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is picked up.")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Files waiting for extraction at most.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Files extracted at the same time.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Extraction processes shared by all files.")
+    parser.add_argument("--retries", type=int, default=RETRIES,
+                        help="How often a failed file is retried before waiting for it to change.")
+    parser.add_argument("--retry-backoff", type=float, default=RETRY_BACKOFF,
+                        help="Seconds before the first retry of a failed file; doubled for every further retry.")
+    parser.add_argument("--state", default=DEFAULT_STATE, help="Where the hashes of processed files are kept.")
+    parser.add_argument("--once", action="store_true", help="Process the current folder contents and exit.")
+    parser.add_argument("--borderless-tables", action="store_true")
+    parser.add_argument("--implicit-rows", action="store_true")
+    parser.add_argument("--implicit-columns", action="store_true")
+    parser.add_argument("--lang", default="eng", help="Tesseract OCR language.")
+    parser.add_argument("--orientation-method", choices=["profile", "osd"], default="profile")
+    parser.add_argument("--output-format", choices=["xlsx", "parquet", "both"], default="parquet")
+    parser.add_argument("--output-dir", default="", help="Where workbooks are written.")
+    parser.add_argument("--dataset-dir", default=DEFAULT_DATASET_DIR,
+                        help="Directory of the consolidated Parquet dataset.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--max-pages-in-memory", type=int, default=MAX_PAGES_IN_MEMORY)
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    options = extraction_options(args.implicit_rows, args.implicit_columns, args.borderless_tables)
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir)
+
+    on_removed = None
+    if args.output_format in ["parquet", "both"]:
+        on_removed = partial(clear_source, args.dataset_dir)
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        process = partial(process_path,
+                          options=options,
+                          executor=executor,
+                          orientation_method=args.orientation_method,
+                          output_dir=args.output_dir,
+                          output_format=args.output_format,
+                          dataset_dir=args.dataset_dir,
+                          lang=args.lang,
+                          max_pages_in_memory=args.max_pages_in_memory,
+                          cache=cache)
+        watcher = FolderWatcher(args.folders, process, args.state, args.settle, args.queue_size,
+                                args.concurrency, args.recursive, on_removed, args.retries, args.retry_backoff)
+        watcher.run(args.interval, once=args.once)
+
+if __name__ == "__main__":
+    main()